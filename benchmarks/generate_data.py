@@ -0,0 +1,179 @@
+"""
+Synthetic project generator for the benchmarks.
+
+Writes the dataset, the optimization results (with ``RM*`` columns), the RM probabilities,
+the cumulative probabilities and the attribute-level results of a project of any size, and
+a configuration file with every chart.
+
+Usage: ``python benchmarks/generate_data.py <output_dir> --models 100000 --solutions 1000``
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULTS = {
+    "models": 10_000,
+    "solutions": 200,
+    "rms": 10,
+    "variables": 4,
+    "attributes": 20,
+    "levels": 5,
+    "plotted": 10,
+    "seed": 0,
+}
+
+
+def _cumulative_probability(values):
+    """
+    Cumulative probability of each value, as 1 minus its rank (equiprobable values).
+    """
+    ranks = np.argsort(np.argsort(values, axis=0, kind="stable"), axis=0, kind="stable")
+    return 1 - ranks / len(values)
+
+
+def _write(df, path, file_format):
+    if file_format == "parquet":
+        df.to_parquet(path.with_suffix(".parquet"), index=False)
+        return path.with_suffix(".parquet").name
+    df.to_csv(path.with_suffix(".csv"), index=False)
+    return path.with_suffix(".csv").name
+
+
+def generate_project(output_dir, parameters=None, file_format="csv", options=None):
+    """
+    Writes a synthetic project.
+
+    :param path output_dir: Project directory
+    :param dict parameters: Number of ``models``, ``solutions``, ``rms``, ``variables``,
+        ``attributes``, ``levels`` of the attributes and ``plotted`` solutions, and ``seed``
+    :param str file_format: Format of the data files, "csv" or "parquet"
+    :param dict options: ``options`` object of the configuration
+    :return: Path to the configuration file
+    """
+    parameters = {**DEFAULTS, **(parameters or {})}
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(parameters["seed"])
+
+    n_models = parameters["models"]
+    n_solutions = parameters["solutions"]
+    n_rms = min(parameters["rms"], n_models)
+    variables = [f"VAR{i + 1}" for i in range(max(parameters["variables"], 2))]
+
+    # Models
+    ids = np.arange(1, n_models + 1)
+    values = rng.normal(size=(n_models, len(variables)))
+    dataset = pd.DataFrame(values, columns=variables)
+    dataset.insert(0, "ID", ids)
+    models_cumulative_prob = pd.DataFrame(_cumulative_probability(values), columns=variables)
+    models_cumulative_prob.insert(0, "ID", ids)
+
+    # Optimization results: RMs of each solution and objective function
+    solution_ids = np.arange(1, n_solutions + 1)
+    rms = np.array([rng.choice(ids, n_rms, replace=False) for _ in solution_ids])
+    solutions_results = pd.DataFrame(rms, columns=[f"RM{i + 1}" for i in range(n_rms)])
+    solutions_results.insert(0, "solution_id", solution_ids)
+    solutions_results.insert(1, "of_value", rng.normal(size=n_solutions).cumsum())
+
+    # RM probabilities and cumulative probabilities
+    probabilities = rng.random((n_solutions, n_rms))
+    probabilities /= probabilities.sum(axis=1, keepdims=True)
+    prob_rms = pd.DataFrame(
+        {
+            "solution_id": np.repeat(solution_ids, n_rms),
+            "probability": probabilities.ravel(),
+        }
+    )
+    rms_values = values[rms - 1]
+    rms_cumulative = np.concatenate(
+        [_cumulative_probability(solution_values) for solution_values in rms_values]
+    )
+    rms_cumulative_prob = pd.DataFrame(rms_cumulative, columns=variables)
+    rms_cumulative_prob.insert(0, "solution_id", np.repeat(solution_ids, n_rms))
+
+    # Attribute levels
+    n_attributes = parameters["attributes"]
+    n_levels = parameters["levels"]
+    frequencies = {}
+    for prefix in ("MODEL_FREQUENCY", "RMS_FREQUENCY"):
+        counts = rng.random((n_solutions * n_attributes, n_levels))
+        counts /= counts.sum(axis=1, keepdims=True)
+        for level in range(n_levels):
+            frequencies[f"{prefix}_{level + 1}"] = counts[:, level]
+    results = pd.DataFrame(
+        {
+            "SOLUTION_ID": np.repeat(solution_ids, n_attributes),
+            "Variable": np.tile([f"ATTR{i + 1}" for i in range(n_attributes)], n_solutions),
+            **frequencies,
+        }
+    )
+
+    files = {
+        name: _write(df, output_dir / name, file_format)
+        for name, df in (
+            ("dataset", dataset),
+            ("solutions", solutions_results),
+            ("rms_probabilities", prob_rms),
+            ("cumulative_probability", models_cumulative_prob),
+            ("rms_cumulative_prob", rms_cumulative_prob),
+            ("attribute_levels", results),
+        )
+    }
+
+    step = max(n_solutions // max(parameters["plotted"], 1), 1)
+    config = {
+        "project_path": str(output_dir.resolve()),
+        "solutions": solution_ids[::step][: parameters["plotted"]].tolist(),
+        "dataset": files["dataset"],
+        "solutions_results": files["solutions"],
+        "plot": {
+            "crossplot": {
+                "variable_list": [[variables[0], variable] for variable in variables[1:]],
+                "prob_rms": files["rms_probabilities"],
+            },
+            "risk_curve": {
+                "models_cumulative_prob": files["cumulative_probability"],
+                "rms_cumulative_prob": files["rms_cumulative_prob"],
+                "variables": variables,
+            },
+            "histogram": {"results": files["attribute_levels"]},
+            "convergence": {"of_name": "of_value", "sense": "minimize"},
+        },
+    }
+    if options:
+        config["options"] = options
+
+    config_path = output_dir / "config.json"
+    config_path.write_text(json.dumps(config, indent=2), encoding="utf-8")
+    return config_path
+
+
+def add_arguments(parser):
+    for key, value in DEFAULTS.items():
+        parser.add_argument(f"--{key}", type=int, default=value, help=f"(default: {value})")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument(
+        "--options", type=json.loads, default=None, help="Options of the configuration (JSON)"
+    )
+
+
+def get_parameters(args):
+    return {key: getattr(args, key) for key in DEFAULTS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic project for RMViewer benchmarks")
+    parser.add_argument("output_dir", type=Path, help="Project directory")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    config_path = generate_project(args.output_dir, get_parameters(args), args.format, args.options)
+    print(f"Synthetic project written to: {config_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Import-time budget of the CLI entry point.
+
+Imports ``rmviewer.__main__`` in fresh interpreters with ``-X importtime`` and times
+``python -m rmviewer --help``. The check fails when the median import time is over the
+budget or when a heavy module (pandas, plotly, ...) is imported before the arguments are
+parsed.
+
+Usage: ``python benchmarks/import_time.py --budget_ms 100``
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Modules that must only be imported once there are charts to build
+HEAVY_MODULES = ("numpy", "pandas", "plotly", "pyarrow")
+
+
+def measure_import(module):
+    """
+    Imports a module in a fresh interpreter.
+
+    :param str module: Module name
+    :return: Cumulative import time of the module (seconds) and heavy modules it imported
+    """
+    code = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))"
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines of -X importtime: "import time: <self us> | <cumulative us> | <module>"
+    cumulative = None
+    for line in process.stderr.splitlines():
+        fields = [field.strip() for field in line.removeprefix("import time:").split("|")]
+        if line.startswith("import time:") and fields[-1] == module:
+            cumulative = int(fields[1]) / 1e6
+    return cumulative, json.loads(process.stdout.splitlines()[-1])
+
+
+def measure_help():
+    """
+    Wall time of ``python -m rmviewer --help``, interpreter start-up included.
+    """
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "rmviewer", "--help"], cwd=ROOT, capture_output=True, check=True
+    )
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RMViewer CLI import-time budget")
+    parser.add_argument("--module", default="rmviewer.__main__", help="Module to import")
+    parser.add_argument(
+        "--budget_ms", type=float, default=100.0, help="Median import time budget (ms)"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters")
+    args = parser.parse_args()
+
+    imports = [measure_import(args.module) for _ in range(args.repeat)]
+    import_time = statistics.median(seconds for seconds, _ in imports)
+    heavy = sorted({name for _, names in imports for name in names})
+    help_time = statistics.median(measure_help() for _ in range(args.repeat))
+
+    print(f"import {args.module}: {import_time * 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"python -m rmviewer --help: {help_time * 1000:.1f} ms")
+    print(f"heavy modules imported: {', '.join(heavy) or 'none'}")
+
+    if import_time * 1000 > args.budget_ms or heavy:
+        print("FAILED - import-time budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
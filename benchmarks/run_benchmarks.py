@@ -0,0 +1,224 @@
+"""
+Benchmarks of the charts of RMViewer on synthetic projects.
+
+Each ``RMViewer.generate_*`` method runs in a fresh process, after the input files are
+loaded, and its wall time, CPU time, peak memory (resident set size of the process) and the
+size of the files it writes are recorded. Results are written as JSON, to be compared
+between versions.
+
+Usage: ``python benchmarks/run_benchmarks.py --models 100000 --output results.json``
+"""
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from generate_data import add_arguments, generate_project, get_parameters  # noqa: E402
+
+METHODS = (
+    "generate_crossplot",
+    "generate_risk_curve",
+    "generate_histogram",
+    "generate_convergence_chart",
+)
+
+
+def _get_arguments(config, data, output_path):
+    """
+    Arguments of each method, as given by the CLI.
+    """
+    plots = config["plot"]
+    return {
+        "generate_crossplot": {
+            "variable_list": plots["crossplot"]["variable_list"],
+            "prob_rms": data.get("prob_rms"),
+            "output_path": output_path,
+        },
+        "generate_risk_curve": {
+            "models_cumulative_prob": data.get("models_cumulative_prob"),
+            "rms_cumulative_prob": data.get("rms_cumulative_prob"),
+            "output_path": output_path,
+            "variables": plots["risk_curve"]["variables"],
+        },
+        "generate_histogram": {"results": data.get("results"), "output_path": output_path},
+        "generate_convergence_chart": {
+            "output_path": output_path,
+            "of_name": plots["convergence"]["of_name"],
+            "sense": plots["convergence"].get("sense", "minimize"),
+        },
+    }
+
+
+# Input files of each method, besides the dataset and the optimization results
+METHOD_INPUTS = {
+    "generate_crossplot": {"prob_rms": ("crossplot", "prob_rms")},
+    "generate_risk_curve": {
+        "models_cumulative_prob": ("risk_curve", "models_cumulative_prob"),
+        "rms_cumulative_prob": ("risk_curve", "rms_cumulative_prob"),
+    },
+    "generate_histogram": {"results": ("histogram", "results")},
+    "generate_convergence_chart": {},
+}
+
+
+def _max_rss():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure(config_path, method, output_path, workers=1):
+    """
+    Runs a method of the viewer and measures it. Runs in a process of its own.
+
+    :param path config_path: Configuration of the synthetic project
+    :param str method: Name of the method
+    :param path output_path: Charts directory
+    :param int workers: Number of processes rendering the per-solution charts
+    :return: Measurements
+    """
+    from rmviewer.context.data_loader import load_config, load_df  # noqa: PLC0415
+    from rmviewer.viewer import RMViewer  # noqa: PLC0415
+
+    started = time.perf_counter()
+    config = load_config(config_path)
+    project_path = Path(config["project_path"])
+    options = config.get("options", {})
+    data = {
+        key: load_df(project_path, config["plot"][plot][name], options=options)
+        for key, (plot, name) in METHOD_INPUTS[method].items()
+    }
+    viewer = RMViewer(
+        solutions=config["solutions"],
+        dataset=load_df(project_path, config["dataset"], options=options),
+        solutions_results=load_df(project_path, config["solutions_results"], options=options),
+        workers=workers,
+        options=config.get("options", {}),
+    )
+    load_time = time.perf_counter() - started
+    rss_loaded = _max_rss()
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    getattr(viewer, method)(**_get_arguments(config, data, Path(output_path))[method])
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+
+    files = [path for path in Path(output_path).rglob("*") if path.is_file()]
+    return {
+        "load_s": load_time,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "peak_rss_bytes": _max_rss(),
+        "loaded_rss_bytes": rss_loaded,
+        "output_files": len(files),
+        "output_bytes": sum(path.stat().st_size for path in files),
+    }
+
+
+def _summary(values):
+    return {"min": min(values), "median": statistics.median(values), "max": max(values)}
+
+
+def run_benchmark(config_path, method, repeat=3, workers=1):
+    """
+    Measures a method several times, each in a fresh process.
+
+    :return: Summary of the measurements
+    """
+    runs = []
+    context = multiprocessing.get_context("spawn")
+    for _ in range(repeat):
+        with (
+            tempfile.TemporaryDirectory(prefix="rmviewer_bench_") as output_path,
+            concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor,
+        ):
+            runs.append(
+                executor.submit(measure, config_path, method, output_path, workers).result()
+            )
+
+    return {
+        "method": method,
+        "ok": all(run["output_files"] > 0 for run in runs),
+        "runs": runs,
+        **{
+            key: _summary([run[key] for run in runs])
+            for key in ("wall_s", "cpu_s", "peak_rss_bytes")
+        },
+        "output_bytes": runs[-1]["output_bytes"],
+    }
+
+
+def _get_versions():
+    versions = {"python": platform.python_version()}
+    for package in ("numpy", "pandas", "plotly", "pyarrow"):
+        try:
+            versions[package] = __import__(package).__version__
+        except ImportError:
+            versions[package] = None
+    return versions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RMViewer chart benchmarks")
+    add_arguments(parser)
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each method")
+    parser.add_argument("--workers", type=int, default=1, help="Rendering processes")
+    parser.add_argument(
+        "--data_dir", type=Path, default=None, help="Keep the synthetic project in this directory"
+    )
+    parser.add_argument(
+        "--output", type=Path, default=Path("benchmark_results.json"), help="Results (JSON)"
+    )
+    args = parser.parse_args()
+
+    parameters = get_parameters(args)
+    with tempfile.TemporaryDirectory(prefix="rmviewer_data_") as temp_dir:
+        data_dir = args.data_dir or Path(temp_dir)
+        print(f"Generating synthetic project in {data_dir}: {parameters}")
+        config_path = generate_project(data_dir, parameters, args.format, args.options)
+
+        results = []
+        for method in args.methods:
+            result = run_benchmark(config_path, method, args.repeat, args.workers)
+            results.append(result)
+            status = "" if result["ok"] else " (no output written, check the log)"
+            print(
+                f"{method}: {result['wall_s']['median']:.3f} s, "
+                f"{result['peak_rss_bytes']['max'] / 2**20:.1f} MiB peak, "
+                f"{result['output_bytes'] / 2**20:.2f} MiB written{status}"
+            )
+
+    report = {
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "cpus": multiprocessing.cpu_count(),
+        "versions": _get_versions(),
+        "parameters": {
+            **parameters,
+            "format": args.format,
+            "options": args.options,
+            "workers": args.workers,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
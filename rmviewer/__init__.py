@@ -1,29 +1,52 @@
 import sys
+from functools import cache
 from pathlib import Path
-from subprocess import run
 
-from .viewer import RMViewer
+# Version files of the repository, from the working directory and from the package
+VERSION_FILES = (
+    Path("scripts/.version"),
+    Path(__file__).resolve().parents[1] / "scripts" / ".version",
+)
 
 
+@cache
 def get_version() -> str:
-    # Try to execute version script (local development)
-    if sys.platform.lower().startswith("linux"):
-        script_path = Path("scripts/version.sh")
-        if script_path.is_file():
-            try:
-                process = run("scripts/version.sh", capture_output=True, check=True)
-                if process.returncode == 0:
-                    return process.stdout.decode().strip()
-            except Exception:
-                pass
-    # At last, read .version file
-    version_path = Path("scripts/.version")
-    if version_path.is_file():
-        with version_path.open("r") as f:
-            return f.read().strip()
-    # Fallback value
-    return "0.0.1"
+    """
+    Version of the application, read without running any process.
+
+    The ``.version`` file written by the build (or by ``scripts/version.sh > scripts/.version``
+    in local development) is read first, then the metadata of the installed package.
+    """
+    version_paths = VERSION_FILES
+    if hasattr(sys, "_MEIPASS"):
+        # PyInstaller bundle (``--add-data .version:.``)
+        version_paths = (Path(sys._MEIPASS) / ".version", *version_paths)
+
+    for version_path in version_paths:
+        if version_path.is_file():
+            with version_path.open("r") as f:
+                version = f.read().strip()
+            if version:
+                return version
+
+    from importlib import metadata  # noqa: PLC0415
+
+    try:
+        return metadata.version("rmviewer")
+    except metadata.PackageNotFoundError:
+        # Fallback value
+        return "0.0.1"
+
+
+def __getattr__(name: str):
+    # RMViewer imports pandas and plotly, so it is only imported when it is used
+    if name == "RMViewer":
+        from .viewer import RMViewer  # noqa: PLC0415
+
+        return RMViewer
+    if name == "__version__":
+        return get_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = ["RMViewer"]
-__version__ = get_version()
@@ -1,18 +1,85 @@
 import argparse
+import json
+import multiprocessing
 import sys
 from pathlib import Path
 
 sys.path.insert(0, ".")
 sys.path.append(str(Path.cwd()).split("rmviewer")[0])
 
-from rmviewer.handler import call_viewer
-
 
 def _get_argument():
     parser = argparse.ArgumentParser(
         description="Representative Model Viewer",
     )
-    parser.add_argument("--config_view", type=str, required=True, help="Path to config file (JSON)")
+    parser.add_argument(
+        "--config_view",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Path to config file (JSON); several files or directories of config files are "
+        "processed in one run, sharing the input files they have in common",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes rendering the per-solution charts (0 uses all CPUs)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Maximum number of loads and chart families running at once (default: all)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Build every chart, even those whose inputs and configuration did not change",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=True,
+        default=False,
+        metavar="PATH",
+        help="Record the time and memory of each stage to a JSON file "
+        "(default: charts/profile.json) and summarize them in the log",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep the convergence chart updated while the optimizer appends solutions",
+    )
+    parser.add_argument(
+        "--watch_interval",
+        type=float,
+        default=60.0,
+        help="Seconds between updates of the convergence chart in watch mode (default: 60)",
+    )
+    parser.add_argument(
+        "--watch_rows",
+        type=int,
+        default=0,
+        help="Number of new solutions that triggers an update in watch mode (default: off)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Load the project once and serve its charts on demand over HTTP",
+    )
+    parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help="Address of the server (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8050, help="Port of the server (default: 8050, 0 picks one)"
+    )
+    parser.add_argument(
+        "--cache_size",
+        type=int,
+        default=128,
+        help="Number of rendered charts kept in memory by the server (default: 128)",
+    )
     return parser
 
 
@@ -21,16 +88,89 @@ def parse_args():
     return parser.parse_args()
 
 
+def _is_config(path: Path) -> bool:
+    """
+    Tells if a JSON file of a directory looks like a configuration (an object with a
+    ``project_path``), so other JSON files, such as the ``manifest.json`` and ``profile.json``
+    written in the charts directory, are left out. Files that can not be parsed are kept, so
+    their error is reported.
+    """
+    try:
+        content = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return True
+    return isinstance(content, dict) and "project_path" in content
+
+
+def get_config_paths(paths: list[str]) -> list[Path]:
+    """
+    Configuration files given in the CLI, with the configuration files (JSON) of the given
+    directories.
+
+    :param list paths: Configuration files or directories
+    :return: Configuration files, each one once, in the given order
+    """
+    config_paths = {}
+    for path in map(Path, paths):
+        if not path.exists():
+            print(f"ERROR - Config file not found: {path}")
+            sys.exit(1)
+        if path.is_dir():
+            files = [file for file in sorted(path.glob("*.json")) if _is_config(file)]
+        else:
+            files = [path]
+        if not files:
+            print(f"ERROR - No config files (JSON) found in: {path}")
+            sys.exit(1)
+        for file in files:
+            config_paths.setdefault(file.resolve(), file)
+    return list(config_paths.values())
+
+
 def main():
     args = parse_args()
 
-    config_path = Path(args.config_view)
-    if not config_path.exists():
-        print(f"ERROR - Config file not found: {config_path}")
+    config_paths = get_config_paths(args.config_view)
+    if args.workers < 0:
+        print(f"ERROR - Invalid number of workers: {args.workers}")
+        sys.exit(1)
+    if args.jobs is not None and args.jobs < 1:
+        print(f"ERROR - Invalid number of jobs: {args.jobs}")
         sys.exit(1)
 
-    call_viewer(config_path)
+    if args.watch:
+        if len(config_paths) > 1:
+            print("ERROR - Watch mode takes a single config file")
+            sys.exit(1)
+        if args.watch_interval <= 0 or args.watch_rows < 0:
+            print("ERROR - Invalid watch settings: interval must be positive and rows not negative")
+            sys.exit(1)
+        from rmviewer.watch import watch_convergence  # noqa: PLC0415
+
+        watch_convergence(config_paths[0], interval=args.watch_interval, rows=args.watch_rows)
+        return
+
+    if args.serve:
+        if len(config_paths) > 1:
+            print("ERROR - Server mode takes a single config file")
+            sys.exit(1)
+        if not 0 <= args.port <= 65535 or args.cache_size < 1:  # noqa: PLR2004
+            print("ERROR - Invalid server settings: port must be 0-65535 and cache size positive")
+            sys.exit(1)
+        from rmviewer.server import serve  # noqa: PLC0415
+
+        serve(config_paths[0], host=args.host, port=args.port, cache_size=args.cache_size)
+        return
+
+    # Imported after the arguments are checked, so --help and argument errors are fast
+    from rmviewer.handler import call_viewer  # noqa: PLC0415
+
+    profile = Path(args.profile) if isinstance(args.profile, str) else args.profile
+    call_viewer(
+        config_paths, workers=args.workers, jobs=args.jobs, force=args.force, profile=profile
+    )
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,125 @@
+import threading
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+from rmviewer.context.data_loader import get_input_files, get_required_columns, load_df
+
+ColumnSelector = Callable[[str], bool]
+
+# Options of the configuration that change how an input file is loaded, with their defaults
+LOAD_OPTIONS = {"memory_map": False, "compact_dtypes": False, "memory_budget_mb": 0}
+
+# Input file and the loading options it is read with
+FileKey = tuple[Path, tuple[tuple[str, Any], ...]]
+
+
+def _union(selectors: list[ColumnSelector | None]) -> ColumnSelector | None:
+    """
+    Column selector accepting the columns of any of the given selectors.
+
+    :param list selectors: Column selectors, None selects every column
+    :return: Column selector, None if any selector reads every column
+    """
+    selected = [selector for selector in selectors if selector is not None]
+    if len(selected) < len(selectors):
+        return None
+    if len(selected) == 1:
+        return selected[0]
+    return lambda column: any(selector(column) for selector in selected)
+
+
+def _get_load_options(config: dict[str, Any]) -> tuple[tuple[str, Any], ...]:
+    """
+    Loading options of a configuration, with their defaults.
+    """
+    options = config.get("options", {})
+    return tuple((key, options.get(key, default)) for key, default in LOAD_OPTIONS.items())
+
+
+class DataCache:
+    """
+    Input files shared by the configurations of a batch.
+
+    Files are identified by their resolved path and their loading options (``LOAD_OPTIONS``),
+    so configurations referring to the same file from different project paths share it, and
+    each configuration gets the file loaded as its own options ask. Each file is parsed once
+    per set of loading options, with the columns that every configuration reads from it, and
+    is dropped when the last configuration using it is released. The loaded DataFrames are
+    shared, so the charts must not modify them.
+    """
+
+    def __init__(self, configs: Iterable[dict[str, Any]] = ()):
+        """
+        :param iterable configs: Validated configurations of the batch
+        """
+        self._columns: dict[FileKey, list[ColumnSelector | None]] = {}
+        self._users: dict[FileKey, int] = {}
+        self._frames: dict[FileKey, Any] = {}
+        self._locks: dict[FileKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        for config in configs:
+            self.add_config(config)
+
+    @staticmethod
+    def _get_keys(config: dict[str, Any]) -> dict[str, FileKey]:
+        project_path = Path(config["project_path"])
+        load_options = _get_load_options(config)
+        return {
+            key: ((project_path / relative_path).resolve(), load_options)
+            for key, relative_path in get_input_files(config).items()
+        }
+
+    def add_config(self, config: dict[str, Any]) -> None:
+        """
+        Registers the input files of a configuration and the columns it reads from them.
+
+        :param dict config: Validated configuration
+        """
+        columns = get_required_columns(config)
+        with self._lock:
+            for key, file_key in self._get_keys(config).items():
+                self._columns.setdefault(file_key, []).append(columns[key])
+                self._users[file_key] = self._users.get(file_key, 0) + 1
+                self._locks.setdefault(file_key, threading.Lock())
+
+    def load(self, config: dict[str, Any], key: str):
+        """
+        Input file of a configuration, parsed on the first request.
+
+        :param dict config: Validated configuration, registered with ``add_config``
+        :param str key: Configuration key of the input file
+        :return: DataFrame
+        """
+        file_key = self._get_keys(config)[key]
+        with self._lock:
+            if file_key not in self._users:
+                raise KeyError(f"Input file of an unregistered configuration: {file_key[0]}")
+            file_lock = self._locks[file_key]
+
+        # Parsing holds the lock of the file only, so different files load concurrently
+        with file_lock:
+            if file_key not in self._frames:
+                path, load_options = file_key
+                options = dict(load_options)
+                self._frames[file_key] = load_df(
+                    path.parent,
+                    path.name,
+                    options["memory_map"],
+                    _union(self._columns[file_key]),
+                    options,
+                )
+            return self._frames[file_key]
+
+    def release(self, config: dict[str, Any]) -> None:
+        """
+        Marks a configuration as done, dropping the files no other configuration uses.
+
+        :param dict config: Validated configuration, registered with ``add_config``
+        """
+        with self._lock:
+            for file_key in self._get_keys(config).values():
+                self._users[file_key] -= 1
+                if self._users[file_key] == 0:
+                    for files in (self._users, self._columns, self._frames, self._locks):
+                        files.pop(file_key, None)
@@ -1,32 +1,184 @@
 import sys
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
 from rmviewer import data_validation
+from rmviewer.logger.custom_logger import Logger
+from rmviewer.utils.profiling import span
 
+RM_PREFIX = "RM"
+FREQUENCY_PREFIXES = ("MODEL_FREQUENCY", "RMS_FREQUENCY")
 
-def load_df(project_path: Path, relative_path: str):
-    return data_validation.load_dataframe(project_path / relative_path)
 
+def _column_selector(names: list[str], prefixes: tuple[str, ...] = ()) -> Callable[[str], bool]:
+    """
+    Builds a column filter accepting the given names and every column starting with a prefix.
 
-def load_data(config_path: Path) -> dict[str, Any]:
+    :param list names: Column names to be read
+    :param tuple prefixes: Column name prefixes to be read
+    :return: Function that tells if a column must be read
     """
-    Loads the files and validates
+    selected = set(names)
 
-    :return: Dictionary with uploaded and validated files
+    def selector(column: str) -> bool:
+        return column in selected or column.startswith(prefixes)
+
+    return selector
+
+
+def get_required_columns(config: dict) -> dict[str, Callable[[str], bool] | None]:
     """
-    config = data_validation.load_json(config_path)
-    data_validation.validate_config(config)
+    Works out the columns each input file needs for the configured plots.
+
+    Keys are the configuration keys of the input files (``dataset``, ``solutions_results``,
+    ``prob_rms``, ``models_cumulative_prob``, ``rms_cumulative_prob`` and ``results``). When
+    column projection is disabled in the options every value is None, so all columns are read.
+
+    :param dict config: Validated configuration
+    :return: Column selector of each input file
+    """
+    plots = config.get("plot", {})
+    keys = [
+        "dataset",
+        "solutions_results",
+        "prob_rms",
+        "models_cumulative_prob",
+        "rms_cumulative_prob",
+        "results",
+    ]
+    if not config.get("options", {}).get("column_projection", True):
+        return dict.fromkeys(keys)
+
+    dataset_columns = ["ID"]
+    solutions_columns = ["solution_id"]
+    risk_variables = []
+
+    if cross_plot := plots.get("crossplot"):
+        for pair in cross_plot["variable_list"]:
+            dataset_columns.extend(pair)
+    if risk_curve_plot := plots.get("risk_curve"):
+        risk_variables = list(risk_curve_plot["variables"])
+        dataset_columns.extend(risk_variables)
+    if convergence_plot := plots.get("convergence"):
+        solutions_columns.append(convergence_plot.get("of_name", "of_value"))
+
+    return {
+        "dataset": _column_selector(dataset_columns),
+        "solutions_results": _column_selector(solutions_columns, (RM_PREFIX,)),
+        "prob_rms": _column_selector(["solution_id", "probability"]),
+        "models_cumulative_prob": _column_selector(risk_variables),
+        "rms_cumulative_prob": _column_selector(["solution_id", *risk_variables]),
+        "results": _column_selector(["SOLUTION_ID", "Variable"], FREQUENCY_PREFIXES),
+    }
+
+
+def get_input_files(config: dict) -> dict[str, str]:
+    """
+    Input files read for the configured plots.
+
+    :param dict config: Validated configuration
+    :return: Path of each input file relative to the project, by configuration key (see
+        ``get_required_columns``)
+    """
+    plots = config.get("plot", {})
+    files = {"dataset": config["dataset"], "solutions_results": config["solutions_results"]}
+    if cross_plot := plots.get("crossplot"):
+        files["prob_rms"] = cross_plot["prob_rms"]
+    if risk_curve_plot := plots.get("risk_curve"):
+        files["models_cumulative_prob"] = risk_curve_plot["models_cumulative_prob"]
+        files["rms_cumulative_prob"] = risk_curve_plot["rms_cumulative_prob"]
+    if hist_plot := plots.get("histogram"):
+        files["results"] = hist_plot["results"]
+    return files
+
 
-    project_path = Path(config.get("project_path"))
+def load_df(
+    project_path: Path,
+    relative_path: str,
+    memory_map: bool = False,
+    columns: Callable[[str], bool] | None = None,
+    options: dict | None = None,
+):
+    """
+    Loads an input file of the project.
+
+    With the ``compact_dtypes`` option the columns are stored in smaller types (see
+    ``compact_dataframe``), within ``memory_budget_mb`` megabytes when it is set, and the
+    memory saved is logged.
+
+    :param path project_path: Project directory
+    :param str relative_path: Input file, relative to the project
+    :param bool memory_map: Memory map the file instead of reading it into a buffer
+    :param callable columns: Selects which columns are read, all columns if None
+    :param dict options: Options of the configuration
+    :return: DataFrame
+    """
+    df = data_validation.load_dataframe(
+        project_path / relative_path, memory_map=memory_map, columns=columns
+    )
+    options = options or {}
+    if not options.get("compact_dtypes", False):
+        return df
+
+    from rmviewer.context.dtypes import compact_dataframe, memory_usage  # noqa: PLC0415
+
+    with span(f"compact:{Path(relative_path).name}"):
+        before = memory_usage(df)
+        df, rounded = compact_dataframe(df, options.get("memory_budget_mb", 0) * 2**20)
+        after = memory_usage(df)
+    saved = before - after
+    Logger().log_info(
+        f"Compact types of {relative_path}: {before / 2**20:.2f} MiB -> {after / 2**20:.2f} MiB "
+        f"(saved {saved / 2**20:.2f} MiB, {saved / max(before, 1):.0%})"
+    )
+    if rounded:
+        Logger().log_warning(
+            f"{relative_path} is over the memory budget, its values were stored in single precision"
+        )
+    return df
+
+
+def load_config(config_path: Path) -> dict[str, Any]:
+    """
+    Loads the configuration file and validates
+
+    :return: Validated configuration
+    """
+    config = data_validation.load_json(config_path)
+    with span("validate:config"):
+        data_validation.validate_config(config)
 
     solutions = config.get("solutions", [])
     if not solutions:
         print("ERROR - No solutions provided in the configuration.")
         sys.exit(1)
 
-    dataset = data_validation.load_dataframe(project_path / config["dataset"])
-    solutions_results = data_validation.load_dataframe(project_path / config["solutions_results"])
+    return config
+
+
+def load_data(config_path: Path) -> dict[str, Any]:
+    """
+    Loads the files and validates
+
+    Only the columns used by the configured plots are read (see ``get_required_columns``).
+
+    :return: Dictionary with uploaded and validated files
+    """
+    config = load_config(config_path)
+    project_path = Path(config["project_path"])
+
+    memory_map = config.get("options", {}).get("memory_map", False)
+    columns = get_required_columns(config)
+    options = config.get("options", {})
+    dataset = load_df(project_path, config["dataset"], memory_map, columns["dataset"], options)
+    solutions_results = load_df(
+        project_path,
+        config["solutions_results"],
+        memory_map,
+        columns["solutions_results"],
+        options,
+    )
 
     return {
         "project_path": project_path,
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from rmviewer.context.data_loader import RM_PREFIX
+
+
+def _unique_index(keys) -> tuple[pd.Index, np.ndarray]:
+    """
+    Hash index over the keys, keeping the first row of repeated keys.
+
+    :param array keys: Key of each row
+    :return: Index of the unique keys and the row position of each of them
+    """
+    keys = pd.Index(keys)
+    first = ~keys.duplicated(keep="first")
+    unique_keys = keys[first]
+    # The hash table of the index is built lazily on the first lookup, which is not safe when
+    # several plots look up rows at the same time, so it is built here
+    _ = unique_keys.is_unique
+    return unique_keys, np.flatnonzero(first)
+
+
+class DatasetIndex:
+    """
+    Row lookups shared by every plot, built once per viewer.
+
+    Models are indexed by their ``ID`` (or by the dataset index when there is no ``ID``
+    column) and the optimization results by ``solution_id``, so rows are found by key
+    instead of relying on the order of the files.
+    """
+
+    def __init__(self, dataset=None, solutions_results=None):
+        """
+        :param dataframe dataset: Models
+        :param dataframe solutions_results: Optimization results
+        """
+        self.models = pd.Index([])
+        self.model_rows = np.array([], dtype=np.int64)
+        if dataset is not None:
+            ids = dataset["ID"] if "ID" in dataset.columns else dataset.index
+            self.models, self.model_rows = _unique_index(ids)
+
+        self.solutions = pd.Index([])
+        self.solution_rows = np.array([], dtype=np.int64)
+        self.rms = np.empty((0, 0))
+        if solutions_results is not None:
+            self.solutions, self.solution_rows = _unique_index(solutions_results["solution_id"])
+            rm_columns = [
+                column for column in solutions_results.columns if str(column).startswith(RM_PREFIX)
+            ]
+            self.rms = solutions_results[rm_columns].to_numpy()
+
+    def model_positions(self, ids, strict=True) -> np.ndarray:
+        """
+        Row positions of the models in the dataset.
+
+        :param list ids: Model IDs
+        :param bool strict: Raise an error for unknown IDs, otherwise their position is -1
+        :return: Row position of each model
+        """
+        positions = self.models.get_indexer(pd.Index(ids))
+        missing = positions < 0
+        if strict and missing.any():
+            raise KeyError(f"Models not found in dataset: {list(np.asarray(ids)[missing])}")
+        return np.where(missing, -1, self.model_rows[positions])
+
+    def has_solution(self, solution_id) -> bool:
+        return solution_id in self.solutions
+
+    def solution_position(self, solution_id) -> int:
+        """
+        Row position of the solution in the optimization results.
+
+        :param int solution_id: Solution ID
+        :return: Row position
+        """
+        position = self.solutions.get_indexer([solution_id])[0]
+        if position < 0:
+            raise KeyError(f"Solution not found in results: {solution_id}")
+        return int(self.solution_rows[position])
+
+    def get_rms(self, solution_id) -> list:
+        """
+        Representative models of the solution (the ``RM*`` columns of its row).
+
+        :param int solution_id: Solution ID
+        :return: RM IDs
+        """
+        return self.rms[self.solution_position(solution_id)].tolist()
@@ -0,0 +1,110 @@
+import re
+
+import numpy as np
+import pandas as pd
+from rmviewer.context.data_loader import RM_PREFIX
+
+# Identifier columns, stored in the smallest integer type that holds them
+KEY_COLUMNS = ("ID", "solution_id", "SOLUTION_ID")
+KEY_PATTERN = re.compile(rf"{RM_PREFIX}\d+")
+
+# Integer types of the identifiers, from the smallest
+KEY_TYPES = (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32)
+
+# Share of distinct values below which text columns are stored as categories
+CATEGORY_RATIO = 0.5
+
+
+def is_key_column(column) -> bool:
+    return column in KEY_COLUMNS or KEY_PATTERN.fullmatch(str(column)) is not None
+
+
+def memory_usage(df: pd.DataFrame) -> int:
+    """
+    Memory used by a DataFrame, text included.
+
+    :param dataframe df: DataFrame
+    :return: Bytes
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _integral(values: np.ndarray) -> bool:
+    return bool(np.isfinite(values).all() and (values == np.round(values)).all())
+
+
+def _compact_key(series: pd.Series) -> pd.Series:
+    """
+    Identifiers in the smallest integer type that holds them. Floats are only converted when
+    every value is a whole number (no NaN), so the IDs are kept exactly.
+    """
+    values = series.to_numpy()
+    if values.dtype.kind not in "iuf" or len(values) == 0:
+        return series
+    if values.dtype.kind == "f" and not _integral(values):
+        return series
+
+    low, high = values.min(), values.max()
+    for key_type in KEY_TYPES:
+        info = np.iinfo(key_type)
+        if info.min <= low and high <= info.max:
+            return series.astype(key_type)
+    return series
+
+
+def _compact_value(series: pd.Series) -> pd.Series:
+    """
+    Values in a smaller type when it holds them exactly.
+
+    Integers become int32 when the difference of any two values still fits in it, so the
+    arithmetic of the charts can not overflow. Floats become float32 when every value is
+    exactly representable. Text with few distinct values becomes categorical.
+    """
+    values = series.to_numpy()
+    kind = values.dtype.kind
+    if kind in "iu" and values.dtype.itemsize > np.dtype(np.int32).itemsize and len(values):
+        limit = np.iinfo(np.int32).max // 2
+        if -limit <= values.min() and values.max() <= limit:
+            return series.astype(np.int32)
+    elif kind == "f" and values.dtype.itemsize > np.dtype(np.float32).itemsize:
+        single = values.astype(np.float32)
+        if np.array_equal(single.astype(values.dtype), values, equal_nan=True):
+            return pd.Series(single, index=series.index, name=series.name)
+    elif kind == "O" and len(values) and series.nunique() <= CATEGORY_RATIO * len(values):
+        return series.astype("category")
+    return series
+
+
+def _to_single_precision(df: pd.DataFrame) -> pd.DataFrame:
+    columns = {
+        column: series.astype(np.float32)
+        if series.dtype == np.float64 and not is_key_column(column)
+        else series
+        for column, series in df.items()
+    }
+    return pd.DataFrame(columns, index=df.index)
+
+
+def compact_dataframe(df: pd.DataFrame, memory_budget: int = 0) -> tuple[pd.DataFrame, bool]:
+    """
+    Stores the columns of a DataFrame in smaller types.
+
+    Identifiers (``ID``, ``solution_id``, ``SOLUTION_ID`` and ``RM<n>``) take the smallest
+    integer type that holds them, and the other columns are only downcast when no value
+    changes (see ``_compact_value``). When the DataFrame still uses more than
+    ``memory_budget`` bytes, its float columns are stored in single precision, which keeps
+    about 7 significant digits.
+
+    :param dataframe df: Loaded DataFrame
+    :param int memory_budget: Maximum bytes of the DataFrame, 0 for no budget
+    :return: Compacted DataFrame and whether values were rounded to fit the budget
+    """
+    columns = {
+        column: _compact_key(series) if is_key_column(column) else _compact_value(series)
+        for column, series in df.items()
+    }
+    df = pd.DataFrame(columns, index=df.index)
+
+    if memory_budget and memory_usage(df) > memory_budget:
+        return _to_single_precision(df), True
+    return df, False
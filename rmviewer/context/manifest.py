@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from rmviewer import __version__, data_validation
+
+MANIFEST_FILE = "manifest.json"
+
+# Input files of each chart, as keys of the configuration (top level or chart section)
+CHART_INPUTS = {
+    "crossplot": ("dataset", "solutions_results", "prob_rms"),
+    "risk_curve": (
+        "dataset",
+        "solutions_results",
+        "models_cumulative_prob",
+        "rms_cumulative_prob",
+    ),
+    "histogram": ("solutions_results", "results"),
+    "convergence": ("solutions_results",),
+}
+
+# Output file of each chart
+CHART_FILES = {
+    "crossplot": "cross_plot.html",
+    "risk_curve": "risk_curve.html",
+    "histogram": "attribute_levels.html",
+    "convergence": "solutions_convergence.html",
+}
+
+# plotly.js bundle loaded by every chart with the ``shared`` mode of the ``plotlyjs`` option
+PLOTLYJS_FILE = "plotly.min.js"
+
+# Options that change the content of the written files; the other options only change how
+# the inputs are loaded
+RENDER_OPTIONS = (
+    "plotlyjs",
+    "render_backend",
+    "webgl_threshold",
+    "background",
+    "background_bins",
+    "background_max_points",
+    "rm_traces",
+    "output_mode",
+    "typed_arrays",
+    "float32",
+    "significant_digits",
+    "compact_dtypes",
+    "memory_budget_mb",
+)
+
+# Seconds subtracted from the start of a run when checking which files it wrote, for file
+# systems that store modification times with a coarse resolution (2s on FAT)
+MTIME_RESOLUTION = 2
+
+
+def hash_file(path: Path) -> str:
+    """
+    Content hash of a file.
+
+    :param path path: File
+    :return: SHA-256 digest
+    """
+    with data_validation.validate_file(path, data_validation.DATAFRAME_EXTENSIONS).open(
+        "rb"
+    ) as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def _hash(content: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_chart_inputs(config: dict[str, Any], chart: str) -> list[str]:
+    """
+    Input files of a chart.
+
+    :param dict config: Configuration
+    :param str chart: Chart name (key of the ``plot`` section)
+    :return: Paths relative to the project
+    """
+    section = config["plot"][chart]
+    return [section.get(key, config.get(key)) for key in CHART_INPUTS[chart]]
+
+
+def get_chart_outputs(
+    config: dict[str, Any], chart: str, has_solution: Callable[[int], bool] | None = None
+) -> dict[str, int | None]:
+    """
+    Files written by a chart.
+
+    :param dict config: Configuration
+    :param str chart: Chart name (key of the ``plot`` section)
+    :param callable has_solution: Tells if a solution is in the optimization results; when
+        given, the histograms of the solutions without results are left out, as they are
+        not written
+    :return: Solution of each file (None for the files of every solution), by path relative
+        to the charts directory
+    """
+    name = CHART_FILES[chart]
+    output_mode = config.get("options", {}).get("output_mode", "solutions")
+    if chart == "convergence" or (output_mode == "dashboard" and chart != "histogram"):
+        return {name: None}
+    return {
+        f"best_sol_{i + 1}_id_{solution}/{name}": solution
+        for i, solution in enumerate(config.get("solutions", []))
+        if chart != "histogram" or has_solution is None or has_solution(solution)
+    }
+
+
+def get_fingerprints(config: dict[str, Any], charts: list[str]) -> dict[str, dict[str, str]]:
+    """
+    Fingerprint of each file of the charts.
+
+    The inputs of a chart (content of its input files, its configuration, the rendering
+    options and the viewer version) are hashed once, and the fingerprint of each file adds
+    the solution it shows. Files showing every solution (dashboards) add the list of
+    solutions, except the convergence chart, which plots every optimization result. Adding
+    a solution thus only changes the fingerprints of its own files. Each input file is
+    hashed once.
+
+    :param dict config: Configuration
+    :param list charts: Chart names
+    :return: Fingerprint of each file (path relative to the charts directory) of each chart
+    """
+    project_path = Path(config["project_path"])
+    options = config.get("options", {})
+    render_options = {key: options[key] for key in RENDER_OPTIONS if key in options}
+    file_hashes = {}
+    fingerprints = {}
+    for chart in charts:
+        inputs = {}
+        for relative_path in get_chart_inputs(config, chart):
+            if relative_path not in file_hashes:
+                file_hashes[relative_path] = hash_file(project_path / relative_path)
+            inputs[relative_path] = file_hashes[relative_path]
+
+        chart_hash = _hash(
+            {
+                "version": __version__,
+                "plot": config["plot"][chart],
+                "options": render_options,
+                "inputs": inputs,
+            }
+        )
+        fingerprints[chart] = {}
+        for output, solution in get_chart_outputs(config, chart).items():
+            if solution is not None:
+                shown = solution
+            elif chart == "convergence":
+                shown = None
+            else:
+                shown = config.get("solutions")
+            fingerprints[chart][output] = _hash({"chart": chart_hash, "solutions": shown})
+    return fingerprints
+
+
+def is_plotlyjs_missing(config: dict[str, Any], charts_path: Path) -> bool:
+    """
+    Tells if the charts load the shared plotly.js bundle and it is missing from the charts
+    directory. The bundle is not fingerprinted as a chart file, so charts that are up to date
+    still need it to be written again.
+
+    :param dict config: Configuration
+    :param path charts_path: Charts directory
+    :return: True if the bundle must be written
+    """
+    if config.get("options", {}).get("plotlyjs", "embed") != "shared":
+        return False
+    return not (Path(charts_path) / PLOTLYJS_FILE).is_file()
+
+
+def load_manifest(charts_path: Path) -> dict[str, Any]:
+    """
+    Loads the build manifest of the charts directory.
+
+    :param path charts_path: Charts directory
+    :return: Manifest, empty if there is none or it can not be read
+    """
+    manifest_path = Path(charts_path) / MANIFEST_FILE
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"outputs": {}}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("outputs"), dict):
+        return {"outputs": {}}
+    return manifest
+
+
+def is_up_to_date(manifest: dict[str, Any], output: str, fingerprint: str, charts_path: Path):
+    """
+    Tells if a file was built with the same fingerprint and is still there. Files that the
+    chart skipped (histograms of solutions without results) are up to date while their
+    fingerprint is the same.
+
+    :param dict manifest: Build manifest
+    :param str output: File, relative to the charts directory
+    :param str fingerprint: Current fingerprint of the file
+    :param path charts_path: Charts directory
+    :return: True if the file does not need to be built again
+    """
+    entry = manifest["outputs"].get(output)
+    if not isinstance(entry, dict) or entry.get("fingerprint") != fingerprint:
+        return False
+    return entry.get("skipped", False) or (Path(charts_path) / output).is_file()
+
+
+def record_outputs(
+    manifest: dict[str, Any],
+    outputs: dict[str, str],
+    written: dict[str, int | None],
+    charts_path: Path,
+    started: float,
+) -> None:
+    """
+    Records the files built in a run in the manifest.
+
+    A file is recorded when it was written in the run, so a file that failed is built again
+    in the next run. Files the chart does not write (missing from ``written``) are recorded
+    as skipped.
+
+    :param dict manifest: Build manifest
+    :param dict outputs: Fingerprint of each file built in the run
+    :param dict written: Files the charts write (see ``get_chart_outputs``)
+    :param path charts_path: Charts directory
+    :param float started: Start time of the run (seconds since the epoch)
+    """
+    for output, fingerprint in outputs.items():
+        manifest["outputs"].pop(output, None)
+        if output not in written:
+            manifest["outputs"][output] = {"fingerprint": fingerprint, "skipped": True}
+            continue
+        path = Path(charts_path) / output
+        if path.is_file() and path.stat().st_mtime >= started - MTIME_RESOLUTION:
+            manifest["outputs"][output] = {"fingerprint": fingerprint}
+
+
+def save_manifest(charts_path: Path, manifest: dict[str, Any]) -> None:
+    """
+    Writes the build manifest to the charts directory, with the viewer version.
+
+    :param path charts_path: Charts directory
+    :param dict manifest: Build manifest
+    """
+    charts_path = Path(charts_path)
+    charts_path.mkdir(parents=True, exist_ok=True)
+    manifest_path = charts_path / MANIFEST_FILE
+    temp_path = manifest_path.with_name(f".{MANIFEST_FILE}.{os.getpid()}")
+    manifest = {**manifest, "version": __version__}
+    temp_path.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    temp_path.replace(manifest_path)
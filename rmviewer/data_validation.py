@@ -1,11 +1,25 @@
+from __future__ import annotations
+
 import json
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from rmviewer.utils.profiling import span
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
 
-import pandas as pd
+    import pandas as pd
 
+DATAFRAME_EXTENSIONS = (".csv", ".parquet", ".feather", ".arrow", ".ipc")
+ARROW_IPC_EXTENSIONS = (".feather", ".arrow", ".ipc")
 
-def validate_file(path: Path, extensions: str = ".csv") -> Path:
+# Optimization senses of the convergence chart
+SENSES = ("minimize", "maximize")
+
+
+def validate_file(path: Path, extensions: str | tuple[str, ...] = ".csv") -> Path:
     """
     Validates if the file exists
 
@@ -23,15 +37,64 @@ def validate_file(path: Path, extensions: str = ".csv") -> Path:
     return file_path
 
 
-def load_dataframe(path: Path) -> pd.DataFrame:
+def _load_arrow_dataframe(
+    file_path: Path, memory_map: bool = False, columns: Callable[[str], bool] | None = None
+) -> pd.DataFrame:
+    """
+    Load Parquet, Feather or Arrow IPC file into DataFrame
+
+    Column types stored in the file (and the pandas metadata written along with them) are
+    preserved, so no type inference is done as in CSV parsing.
+
+    :param Path file_path: Validated file path
+    :param bool memory_map: Memory map the file instead of reading it into a buffer
+    :param callable columns: Selects which columns are read, all columns if None
+    :return: Data loaded into DataFrame
+    """
+    try:
+        from pyarrow import feather, ipc, parquet  # noqa: PLC0415
+    except ImportError:
+        print(f"ERROR - 'pyarrow' is required to read {file_path.suffix} files: {file_path}")
+        sys.exit(1)
+
+    is_ipc = file_path.suffix in ARROW_IPC_EXTENSIONS
+    selected = None
+    if columns is not None:
+        if is_ipc:
+            with ipc.open_file(file_path) as reader:
+                names = reader.schema.names
+        else:
+            names = parquet.read_schema(file_path).names
+        selected = [name for name in names if columns(name)]
+
+    if is_ipc:
+        table = feather.read_table(file_path, columns=selected, memory_map=memory_map)
+    else:
+        table = parquet.read_table(
+            file_path, columns=selected, memory_map=memory_map, use_pandas_metadata=True
+        )
+    return table.to_pandas()
+
+
+def load_dataframe(
+    path: Path, memory_map: bool = False, columns: Callable[[str], bool] | None = None
+) -> pd.DataFrame:
     """
-    Load CSV into DataFrame with validation
+    Load CSV, Parquet, Feather or Arrow IPC file into DataFrame with validation
 
-    :param str path: CSV file path
+    :param str path: Data file path
+    :param bool memory_map: Memory map the file instead of reading it into a buffer
+    :param callable columns: Selects which columns are read, all columns if None
     :return: Data loaded into DataFrame
     """
-    file_path = validate_file(path, extensions=".csv")
-    return pd.read_csv(file_path)
+    file_path = validate_file(path, extensions=DATAFRAME_EXTENSIONS)
+    with span(f"parse:{file_path.name}"):
+        if file_path.suffix == ".csv":
+            # Imported here so the configuration is validated without loading pandas
+            import pandas as pd  # noqa: PLC0415
+
+            return pd.read_csv(file_path, memory_map=memory_map, usecols=columns)
+        return _load_arrow_dataframe(file_path, memory_map, columns)
 
 
 def load_json(path: Path) -> dict:
@@ -147,6 +210,78 @@ def _validate_histogram(config: dict) -> None:
         sys.exit(1)
 
 
+def _validate_convergence(config: dict) -> None:
+    """
+    Validates the configuration data for convergence.
+
+    :config: Cofigurations from JSON file
+    """
+    convergence_plot = config["plot"]["convergence"]
+    if convergence_plot.get("sense", "minimize") not in SENSES:
+        print(
+            "ERROR - Invalid configuration for convergence: "
+            f"'sense' must be one of {', '.join(repr(sense) for sense in SENSES)}"
+        )
+        sys.exit(1)
+
+
+def _validate_options(config: dict) -> None:
+    """
+    Validates the optional execution settings.
+
+    :config: Cofigurations from JSON file
+    """
+    options = config["options"]
+    if not isinstance(options, dict):
+        print("ERROR - Invalid configuration: 'options' must be an object")
+        sys.exit(1)
+    for key in ("memory_map", "column_projection", "typed_arrays", "float32", "compact_dtypes"):
+        if not isinstance(options.get(key, False), bool):
+            print(f"ERROR - Invalid configuration for options: '{key}' must be a boolean")
+            sys.exit(1)
+    if options.get("plotlyjs", "embed") not in ("embed", "shared"):
+        print("ERROR - Invalid configuration for options: 'plotlyjs' must be 'embed' or 'shared'")
+        sys.exit(1)
+    if options.get("render_backend", "auto") not in ("auto", "svg", "webgl"):
+        print(
+            "ERROR - Invalid configuration for options: "
+            "'render_backend' must be 'auto', 'svg' or 'webgl'"
+        )
+        sys.exit(1)
+    if options.get("background", "raw") not in ("raw", "density", "decimate"):
+        print(
+            "ERROR - Invalid configuration for options: "
+            "'background' must be 'raw', 'density' or 'decimate'"
+        )
+        sys.exit(1)
+    if options.get("rm_traces", "individual") not in ("individual", "batched"):
+        print(
+            "ERROR - Invalid configuration for options: "
+            "'rm_traces' must be 'individual' or 'batched'"
+        )
+        sys.exit(1)
+    if options.get("output_mode", "solutions") not in ("solutions", "dashboard"):
+        print(
+            "ERROR - Invalid configuration for options: "
+            "'output_mode' must be 'solutions' or 'dashboard'"
+        )
+        sys.exit(1)
+    for key, minimum in (
+        ("webgl_threshold", 0),
+        ("background_bins", 1),
+        ("background_max_points", 1),
+        ("significant_digits", 0),
+        ("memory_budget_mb", 0),
+    ):
+        value = options.get(key, minimum)
+        if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+            print(
+                f"ERROR - Invalid configuration for options: "
+                f"'{key}' must be an integer greater than or equal to {minimum}"
+            )
+            sys.exit(1)
+
+
 def validate_solutions(config: dict) -> None:
     solutions = config.get("solutions", [])
     if not solutions:
@@ -175,3 +310,7 @@ def validate_config(config: dict) -> None:
         _validate_risk_curve(config, project_path)
     if "histogram" in plot_cfg:
         _validate_histogram(config)
+    if "convergence" in plot_cfg:
+        _validate_convergence(config)
+    if "options" in config:
+        _validate_options(config)
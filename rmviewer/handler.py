@@ -1,59 +1,319 @@
+import json
+import math
+import sys
+import time
 from pathlib import Path
+from typing import Any
 
-from rmviewer.context.data_loader import load_data, load_df
-from rmviewer.viewer import RMViewer
+from rmviewer.context.data_cache import DataCache
+from rmviewer.context.data_loader import load_config
+from rmviewer.context.manifest import (
+    CHART_FILES,
+    get_chart_outputs,
+    get_fingerprints,
+    is_plotlyjs_missing,
+    is_up_to_date,
+    load_manifest,
+    record_outputs,
+    save_manifest,
+)
+from rmviewer.logger.custom_logger import Logger
+from rmviewer.utils.profiling import enable_profiling, span, write_profile
+from rmviewer.utils.scheduler import TaskScheduler
 
+PROFILE_FILE = "profile.json"
 
-def call_viewer(config_path: Path) -> None:
+
+def _get_stale_charts(config, charts_path, force=False):
     """
-    Prepara os dados para a execução
+    Files whose fingerprint changed since they were built, as recorded in the manifest.
+
+    :param dict config: Configuration
+    :param path charts_path: Charts directory
+    :param bool force: Build every file again
+    :return: Manifest and the fingerprints of the files to be built, by chart
+    """
+    plots = config.get("plot", {})
+    charts = [chart for chart in CHART_FILES if plots.get(chart)]
+    manifest = load_manifest(charts_path)
+    fingerprints = get_fingerprints(config, charts)
+
+    stale = {}
+    for chart in charts:
+        outputs = {
+            output: fingerprint
+            for output, fingerprint in fingerprints[chart].items()
+            if force or not is_up_to_date(manifest, output, fingerprint, charts_path)
+        }
+        if not outputs:
+            Logger().log_info(f"Skipping {chart}: inputs and configuration unchanged")
+            continue
+        if len(outputs) < len(fingerprints[chart]):
+            Logger().log_info(
+                f"Building {len(outputs)} of {len(fingerprints[chart])} {chart} files: "
+                "the others are unchanged"
+            )
+        stale[chart] = outputs
+    return manifest, stale
+
+
+def _get_targets(outputs):
+    """
+    Solution directories of the files to be built, None when the chart writes a single file.
+
+    :param dict outputs: Files to be built, relative to the charts directory
+    :return: Solution directories
+    """
+    targets = {Path(output).parent.name for output in outputs}
+    return None if "" in targets else targets
+
+
+def _update_manifest(config, charts_path, built, started, has_solution):
+    """
+    Records the files built in this run in the manifest (see ``record_outputs``).
 
-    :param dict config_path
+    :param dict config: Configuration
+    :param path charts_path: Charts directory
+    :param tuple built: Manifest and fingerprints of the files built in this run, by chart
+    :param float started: Start time of the run (seconds since the epoch)
+    :param callable has_solution: Tells if a solution is in the optimization results
     """
+    manifest, stale = built
+    for chart, outputs in stale.items():
+        written = get_chart_outputs(config, chart, has_solution)
+        record_outputs(manifest, outputs, written, charts_path, started)
+    save_manifest(charts_path, manifest)
 
-    data = load_data(config_path)
-    config = data.get("config")
 
-    if config is None:
-        raise ValueError("'config' key is required in date.")
+def _get_profile_path(config_path: Path) -> Path:
+    """
+    Default metrics file of the profile, in the charts directory of the project.
+    """
+    try:
+        project_path = Path(json.loads(Path(config_path).read_text())["project_path"])
+    except (OSError, ValueError, KeyError, TypeError):
+        project_path = Path.cwd()
+    return project_path / "charts" / PROFILE_FILE
+
+
+def call_viewer(
+    config_paths: Path | list[Path],
+    workers: int = 1,
+    jobs: int | None = None,
+    force: bool = False,
+    profile: Path | bool = False,
+) -> None:
+    """
+    Generates the configured charts of one or more configuration files, recording
+    instrumentation spans when ``profile`` is set. The spans are written to the metrics file
+    given in ``profile`` (or to ``charts/profile.json`` of the first configuration) and
+    summarized in the log, even if the run fails.
+
+    :param config_paths: Configuration file, or list of configuration files
+    :param int workers: Number of processes rendering the per-solution charts
+    :param int jobs: Maximum number of stages (loads and charts) running at once
+    :param bool force: Build every chart, even the unchanged ones
+    :param profile: Metrics file (JSON), True for the default file, False to not profile
+    """
+    if isinstance(config_paths, str | Path):
+        config_paths = [Path(config_paths)]
 
-    project_path = Path(data.get("project_path"))
+    if not profile:
+        _call_viewers(config_paths, workers, jobs, force)
+        return
+
+    enable_profiling()
+    try:
+        with span("run"):
+            _call_viewers(config_paths, workers, jobs, force)
+    finally:
+        write_profile(_get_profile_path(config_paths[0]) if profile is True else profile)
+        enable_profiling(enabled=False)
+
+
+def _call_viewers(
+    config_paths: list[Path], workers: int = 1, jobs: int | None = None, force: bool = False
+) -> None:
+    """
+    Generates the charts of each configuration, one configuration after another.
+
+    Every configuration is validated first. Input files used by several configurations are
+    loaded once and shared (see ``DataCache``). A configuration that fails does not stop the
+    others; the run exits with an error at the end if any of them failed.
+
+    :param list config_paths: Configuration files
+    :param int workers: Number of processes rendering the per-solution charts
+    :param int jobs: Maximum number of stages (loads and charts) running at once
+    :param bool force: Build every chart, even the unchanged ones
+    """
+    configs = {}
+    failed = []
+    for config_path in config_paths:
+        try:
+            with span("load:config"):
+                configs[config_path] = load_config(config_path)
+        except SystemExit:
+            # The validation error was already printed
+            failed.append(config_path)
+
+    cache = DataCache(configs.values())
+    for config_path, config in configs.items():
+        if len(config_paths) > 1:
+            Logger().log_info(f"Generating charts of configuration: {config_path}")
+        try:
+            with span(f"config:{Path(config_path).name}"):
+                _call_viewer(config, cache, workers, jobs, force)
+        except SystemExit:
+            failed.append(config_path)
+        except Exception as ex:
+            Logger().log_error(f"Error generating charts of configuration {config_path}: {ex}")
+            failed.append(config_path)
+        finally:
+            cache.release(config)
+
+    if failed:
+        Logger().log_error(
+            f"{len(failed)} of {len(config_paths)} configuration(s) failed: "
+            + ", ".join(str(config_path) for config_path in failed)
+        )
+        sys.exit(1)
+
+
+def _call_viewer(
+    config: dict[str, Any],
+    cache: DataCache,
+    workers: int = 1,
+    jobs: int | None = None,
+    force: bool = False,
+) -> None:
+    """
+    Prepara os dados para a execução
+
+    Every input file is loaded at once and each chart family starts as soon as the data it
+    needs is loaded. A timeline of the stages is logged at the end. Chart files whose inputs,
+    configuration, solution and viewer version did not change since the last run (as
+    recorded in the build manifest of the charts directory) are skipped, unless ``force`` is
+    set.
+
+    :param dict config: Validated configuration
+    :param DataCache cache: Input files, shared with the other configurations of the run
+    :param int workers: Number of processes rendering the per-solution charts
+    :param int jobs: Maximum number of stages (loads and charts) running at once, None runs
+        every ready stage at once
+    :param bool force: Build every chart, even the unchanged ones
+    """
+
+    project_path = Path(config["project_path"])
     solutions = config.get("solutions")
-    dataset = data.get("dataset")
-    solutions_results = data.get("solutions_results")
-    plots = config.get("plot", {})
+    results_path = project_path / "charts"
+
+    started = math.floor(time.time())
+    with span("manifest:fingerprints"):
+        manifest, stale = _get_stale_charts(config, results_path, force)
+    if is_plotlyjs_missing(config, results_path):
+        # Only the bundle is written again, the charts referencing it are up to date
+        Logger().log_info(f"Writing the shared plotly.js bundle missing from: {results_path}")
+        with span("write:plotlyjs"):
+            from rmviewer.utils.figures import write_shared_plotlyjs  # noqa: PLC0415
 
-    viewer = RMViewer(
-        solutions=solutions,
-        dataset=dataset,
-        solutions_results=solutions_results,
+            write_shared_plotlyjs(results_path)
+    if not stale:
+        Logger().log_info(f"Charts are up to date in: {results_path}")
+        return
+
+    # pandas and plotly are only imported once there are charts to build, and only the
+    # modules of those charts
+    with span("import:viewer"):
+        from rmviewer.viewer import RMViewer, import_charts  # noqa: PLC0415
+    import_charts(stale)
+
+    plots = {chart: section for chart, section in config.get("plot", {}).items() if chart in stale}
+
+    def load(key: str):
+        def load_file():
+            with span(f"load:{key}"):
+                return cache.load(config, key)
+
+        return load_file
+
+    scheduler = TaskScheduler(max_workers=jobs)
+    scheduler.add_task("load:dataset", load("dataset"))
+    scheduler.add_task("load:solutions_results", load("solutions_results"))
+
+    cross_plot = plots.get("crossplot")
+    if cross_plot:
+        scheduler.add_task("load:prob_rms", load("prob_rms"))
+
+    risk_curve_plot = plots.get("risk_curve")
+    if risk_curve_plot:
+        scheduler.add_task("load:models_cumulative_prob", load("models_cumulative_prob"))
+        scheduler.add_task("load:rms_cumulative_prob", load("rms_cumulative_prob"))
+
+    hist_plot = plots.get("histogram")
+    if hist_plot:
+        scheduler.add_task("load:results", load("results"))
+
+    def create_viewer(**data):
+        return RMViewer(
+            solutions=solutions,
+            dataset=data["load:dataset"],
+            solutions_results=data["load:solutions_results"],
+            workers=workers,
+            options=config.get("options", {}),
+        )
+
+    scheduler.add_task(
+        "viewer", create_viewer, depends_on=("load:dataset", "load:solutions_results")
     )
 
-    results_path = project_path / "charts"
-    if cross_plot := plots.get("crossplot"):
-        prob_rms = load_df(project_path, cross_plot["prob_rms"])
-        viewer.generate_crossplot(
-            variable_list=cross_plot["variable_list"], prob_rms=prob_rms, output_path=results_path
+    if cross_plot:
+        scheduler.add_task(
+            "plot:crossplot",
+            lambda **data: data["viewer"].generate_crossplot(
+                variable_list=cross_plot["variable_list"],
+                prob_rms=data["load:prob_rms"],
+                output_path=results_path,
+                targets=_get_targets(stale["crossplot"]),
+            ),
+            depends_on=("viewer", "load:prob_rms"),
         )
 
-    if risk_curve_plot := plots.get("risk_curve"):
-        models_cumulative_prob = load_df(project_path, risk_curve_plot["models_cumulative_prob"])
-        rms_cumulative_prob = load_df(project_path, risk_curve_plot["rms_cumulative_prob"])
-        viewer.generate_risk_curve(
-            models_cumulative_prob=models_cumulative_prob,
-            rms_cumulative_prob=rms_cumulative_prob,
-            output_path=results_path,
-            variables=risk_curve_plot["variables"],
+    if risk_curve_plot:
+        scheduler.add_task(
+            "plot:risk_curve",
+            lambda **data: data["viewer"].generate_risk_curve(
+                models_cumulative_prob=data["load:models_cumulative_prob"],
+                rms_cumulative_prob=data["load:rms_cumulative_prob"],
+                output_path=results_path,
+                variables=risk_curve_plot["variables"],
+                targets=_get_targets(stale["risk_curve"]),
+            ),
+            depends_on=("viewer", "load:models_cumulative_prob", "load:rms_cumulative_prob"),
         )
 
-    if hist_plot := plots.get("histogram"):
-        results = load_df(project_path, hist_plot["results"])
-        viewer.generate_histogram(
-            results=results,
-            output_path=results_path,
+    if hist_plot:
+        scheduler.add_task(
+            "plot:histogram",
+            lambda **data: data["viewer"].generate_histogram(
+                results=data["load:results"],
+                output_path=results_path,
+                targets=_get_targets(stale["histogram"]),
+            ),
+            depends_on=("viewer", "load:results"),
         )
 
     if convergence_plot := plots.get("convergence"):
-        viewer.generate_convergence_chart(
-            output_path=results_path, of_name=convergence_plot["of_name"]
+        scheduler.add_task(
+            "plot:convergence",
+            lambda **data: data["viewer"].generate_convergence_chart(
+                output_path=results_path,
+                of_name=convergence_plot["of_name"],
+                sense=convergence_plot.get("sense", "minimize"),
+            ),
+            depends_on=("viewer",),
         )
+
+    results = scheduler.run()
+    scheduler.log_timeline()
+    has_solution = results["viewer"].index.has_solution
+    _update_manifest(config, results_path, (manifest, stale), started, has_solution)
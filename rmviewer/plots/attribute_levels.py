@@ -1,32 +1,64 @@
 from pathlib import Path
 
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from rmviewer.context.data_loader import FREQUENCY_PREFIXES
+from rmviewer.context.dataset_index import DatasetIndex
 from rmviewer.logger.custom_logger import Logger
-from rmviewer.utils.figures import get_html_centered_content
-
-
-def generate_histogram(df_rm, charts_path, path_solutions):
-    df_rm = df_rm.reset_index(drop=True)
+from rmviewer.utils.aggregation import group_rows
+from rmviewer.utils.figures import get_plotlyjs_source, write_centered_html
+from rmviewer.utils.parallel import render_solutions
+from rmviewer.utils.profiling import profiled
+
+
+@profiled("extract:attribute_levels")
+def get_attribute_levels(results, solutions):
+    """
+    Extracts the frequencies of the attribute levels of every solution in a single pass.
+
+    The results are grouped by ``SOLUTION_ID`` once and the ``MODEL_FREQUENCY*`` and
+    ``RMS_FREQUENCY*`` blocks are converted to arrays, with one row per attribute.
+
+    :param dataframe results: Result of the evaluation of the attribute level
+    :param list solutions: Solution IDs to be plotted
+    :return: For each solution, the attributes (``variables``) and the frequencies of the
+        models (``model``) and of the RMs (``rms``)
+    """
+    results = results[results["SOLUTION_ID"].isin(solutions)]
+    model_prefix, rms_prefix = FREQUENCY_PREFIXES
+    model_columns = [column for column in results.columns if str(column).startswith(model_prefix)]
+    rms_columns = [column for column in results.columns if str(column).startswith(rms_prefix)]
+
+    groups = group_rows(
+        results["SOLUTION_ID"].to_numpy(),
+        results["Variable"].to_numpy(),
+        results[model_columns].to_numpy(dtype=np.float64),
+        results[rms_columns].to_numpy(dtype=np.float64),
+    )
+    return {
+        solution: {"variables": variables, "model": model, "rms": rms}
+        for solution, (variables, model, rms) in groups.items()
+    }
 
-    model_frequencies = df_rm.filter(regex="^MODEL_FREQUENCY").columns
-    rms_frequencies = df_rm.filter(regex="^RMS_FREQUENCY").columns
 
-    num_plots = len(df_rm)
+@profiled("figure:histogram")
+def get_figure(levels):
+    num_plots = len(levels["variables"])
 
     fig = make_subplots(
         rows=num_plots,
         cols=1,
-        subplot_titles=df_rm["Variable"].to_list(),
+        subplot_titles=levels["variables"].tolist(),
         shared_xaxes=False,
     )
 
     show_legend_model = True
     show_legend_rms = True
 
-    for i, row in df_rm.iterrows():
-        model_values = row[model_frequencies].dropna().values
-        rms_values = row[rms_frequencies].dropna().values
+    for i, (model_row, rms_row) in enumerate(zip(levels["model"], levels["rms"], strict=True)):
+        model_values = model_row[~np.isnan(model_row)]
+        rms_values = rms_row[~np.isnan(rms_row)]
 
         x_axis_values = list(range(1, len(model_values) + 1))
 
@@ -82,32 +114,43 @@ def generate_histogram(df_rm, charts_path, path_solutions):
         margin={"l": 50, "r": 50, "t": 50, "b": 50},
         showlegend=True,
     )
+    return fig
 
-    config = {"displayModeBar": True, "scrollZoom": True}
+
+def generate_histogram(levels, charts_path, path_solutions, options=None):
+    fig = get_figure(levels)
 
     path = charts_path / Path(path_solutions)
     path.mkdir(parents=True, exist_ok=True)
     html_path = path / Path("attribute_levels.html")
-    fig.write_html(html_path, config=config)
-
-    with Path(html_path).open(encoding="utf-8") as file:
-        content = file.read()
-
-    centered_content = get_html_centered_content(content, width="800px")
+    include_plotlyjs = get_plotlyjs_source(charts_path, html_path, options)
+    write_centered_html(fig, html_path, width="800px", include_plotlyjs=include_plotlyjs)
 
-    with Path(html_path).open("w", encoding="utf-8") as file:
-        file.write(centered_content)
 
+def render_solution(context, task):
+    levels, path_solution = task
+    generate_histogram(levels, context["charts_path"], path_solution, context["options"])
 
-def generate_attribute_levels_chart(dataset, solutions, results, output_path):
-    df_of = results
 
-    df_rms = dataset[dataset["solution_id"].isin(solutions)]
+def generate_attribute_levels_chart(dataset, solutions, results, output_path, config=None):
+    config = config or {}
+    index = config.get("index") or DatasetIndex(solutions_results=dataset)
+    attribute_levels = get_attribute_levels(results, solutions)
+    no_levels = {
+        "variables": np.array([], dtype=object),
+        "model": np.empty((0, 0)),
+        "rms": np.empty((0, 0)),
+    }
 
     path_solutions = [f"best_sol_{i + 1}_id_{id_}" for i, id_ in enumerate(solutions)]
 
-    for i, rm in enumerate(df_rms["solution_id"].to_list()):
-        df_rm = df_of[df_of["SOLUTION_ID"].isin([rm])]
-        generate_histogram(df_rm, output_path, path_solutions[i])
+    targets = config.get("targets")
+    tasks = [
+        (attribute_levels.get(solution, no_levels), path_solutions[i])
+        for i, solution in enumerate(solutions)
+        if index.has_solution(solution) and (targets is None or path_solutions[i] in targets)
+    ]
+    context = {"charts_path": output_path, "options": config.get("options", {})}
+    render_solutions(render_solution, context, tasks, config.get("workers", 1))
 
     Logger().log_info(f"Attribute-level histograms generated in: {output_path}")
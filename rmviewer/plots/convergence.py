@@ -1,54 +1,118 @@
 from pathlib import Path
 
-import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 from rmviewer.logger.custom_logger import Logger
-
-
-def generate_fig(df, show_legend=False, of_name="of_value"):
-    df = df.sort_values(by="solution_id").reset_index(drop=True)
-
-    selected = [df.iloc[0]]
-    for i in range(1, len(df)):
-        if df.iloc[i][of_name] < selected[-1][of_name]:
-            selected.append(df.iloc[i])
-
-    df_selected = pd.DataFrame(selected)
-
-    iterations = df_selected["solution_id"]
-    of_value = df_selected[of_name]
-
-    fig = go.Figure()
-
-    fig.add_trace(
-        go.Scatter(
-            x=iterations,
-            y=of_value,
-            mode="lines+markers",
-            line={"color": "#003C71", "width": 4},
-            marker={"color": "#003C71", "size": 5},
-            name="Evolution of the objective function",
-            showlegend=show_legend,
-        )
+from rmviewer.utils.figures import get_plotlyjs_source
+from rmviewer.utils.profiling import profiled, span
+
+VARIABLES = [
+    {
+        "title": "Convergence of the Optimization Method",
+    },
+]
+
+
+def get_improvements(solution_ids, of_values, sense="minimize"):
+    """
+    Solutions that improved the objective function, in solution order.
+
+    The first solution is always kept and then every solution strictly better than all the
+    previous ones. The running best is computed with a single accumulate over the arrays,
+    so it handles histories with tens of millions of evaluations. NaN values never improve
+    the objective function.
+
+    :param array solution_ids: Solution IDs
+    :param array of_values: Objective function value of each solution
+    :param str sense: Optimization sense, "minimize" or "maximize"
+    :return: Solution IDs and objective function values of the improving solutions
+    """
+    solution_ids = np.asarray(solution_ids)
+    of_values = np.asarray(of_values, dtype=np.float64)
+    if len(solution_ids) == 0:
+        return solution_ids, of_values
+
+    if np.any(solution_ids[1:] < solution_ids[:-1]):
+        order = np.argsort(solution_ids, kind="stable")
+        solution_ids = solution_ids[order]
+        of_values = of_values[order]
+
+    # Running minimum of the values to be minimized
+    values = -of_values if sense == "maximize" else of_values
+    best = np.fmin.accumulate(values)
+
+    improved = np.empty(len(values), dtype=bool)
+    improved[0] = True
+    improved[1:] = values[1:] < best[:-1]
+    if np.isnan(values[0]):
+        improved[1:] = False
+
+    return solution_ids[improved], of_values[improved]
+
+
+def update_improvements(state, solution_ids, of_values, sense="minimize"):
+    """
+    Adds new evaluations to the improvements found so far.
+
+    Only the new evaluations are processed: their own improvements are computed and those
+    better than the current best are appended. New evaluations are expected to come after
+    the previous ones in solution order, as when the optimizer appends them to the history.
+
+    :param dict state: Improvements so far (``iterations`` and ``values``), None if empty
+    :param array solution_ids: Solution IDs of the new evaluations
+    :param array of_values: Objective function values of the new evaluations
+    :param str sense: Optimization sense, "minimize" or "maximize"
+    :return: Updated improvements
+    """
+    if state is None or len(state["values"]) == 0:
+        iterations, values = get_improvements(solution_ids, of_values, sense)
+        return {"iterations": iterations, "values": values}
+
+    solution_ids = np.asarray(solution_ids)
+    of_values = np.asarray(of_values, dtype=np.float64)
+    valid = ~np.isnan(of_values)
+    iterations, values = get_improvements(solution_ids[valid], of_values[valid], sense)
+
+    best = state["values"][-1]
+    improved = values > best if sense == "maximize" else values < best
+    return {
+        "iterations": np.concatenate((state["iterations"], iterations[improved])),
+        "values": np.concatenate((state["values"], values[improved])),
+    }
+
+
+def get_trace(iterations, of_value, show_legend=False):
+    return go.Scatter(
+        x=iterations,
+        y=of_value,
+        mode="lines+markers",
+        line={"color": "#003C71", "width": 4},
+        marker={"color": "#003C71", "size": 5},
+        name="Evolution of the objective function",
+        showlegend=show_legend,
     )
 
-    return fig
 
-
-def add_figure(vars_, fig, df, of_name):
+def add_improvements(vars_, fig, iterations, of_value):
     legend = True
     for _var in vars_:
-        mini_fig = generate_fig(df, show_legend=legend, of_name=of_name)
-
-        for trace in mini_fig.data:
-            fig.add_trace(trace)
-
+        fig.add_trace(get_trace(iterations, of_value, show_legend=legend))
         legend = False
 
     return fig
 
 
+@profiled("figure:convergence")
+def add_figure(vars_, fig, df, of_name, sense="minimize"):
+    # The improvements are the same for every entry, so they are computed once
+    iterations, of_value = get_improvements(
+        df["solution_id"].to_numpy(), df[of_name].to_numpy(), sense
+    )
+    return add_improvements(vars_, fig, iterations, of_value)
+
+
 def update_figure(vars_, fig):
     for var in vars_:
         fig.update_layout(
@@ -68,22 +132,28 @@ def update_figure(vars_, fig):
     return fig
 
 
-def show_figure(variables, df, charts_path, of_name):
-    fig = make_subplots(rows=1, cols=1)
-    fig = add_figure(variables, fig, df, of_name)
+def write_figure(variables, fig, charts_path, options=None):
     fig = update_figure(variables, fig)
 
+    Path(charts_path).mkdir(parents=True, exist_ok=True)
     path_html = charts_path / Path("solutions_convergence.html")
-    fig.write_html(path_html, full_html=True)
+    include_plotlyjs = get_plotlyjs_source(charts_path, path_html, options)
+    with span("serialize:html"):
+        content = pio.to_html(fig, full_html=True, include_plotlyjs=include_plotlyjs)
+    with span("write:html"):
+        path_html.write_text(content, encoding="utf-8")
+
+    return path_html
 
-    Logger().log_info(f"Convergence chart generated in: {path_html}")
 
+def show_figure(variables, df, charts_path, config):
+    fig = make_subplots(rows=1, cols=1)
+    fig = add_figure(variables, fig, df, config["of_name"], config.get("sense", "minimize"))
+    path_html = write_figure(variables, fig, charts_path, config.get("options"))
+
+    Logger().log_info(f"Convergence chart generated in: {path_html}")
 
-def convergence_chart(df, charts_path, of_name):
-    variables = [
-        {
-            "title": "Convergence of the Optimization Method",
-        },
-    ]
 
-    show_figure(variables, df, charts_path, of_name)
+def convergence_chart(df, charts_path, of_name, options=None, sense="minimize"):
+    config = {"of_name": of_name, "options": options, "sense": sense}
+    show_figure(VARIABLES, df, charts_path, config)
@@ -1,38 +1,125 @@
 import math
 
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from rmviewer.context.dataset_index import DatasetIndex
 from rmviewer.logger.custom_logger import Logger
-from rmviewer.utils.figures import get_colors, update_figure, update_html
+from rmviewer.utils.aggregation import (
+    BACKGROUND_BINS,
+    BACKGROUND_MAX_POINTS,
+    bin_density,
+    decimate,
+    group_rows,
+)
+from rmviewer.utils.figures import (
+    build_dashboard,
+    build_figure,
+    get_colors,
+    get_figure_template,
+    get_rm_traces,
+    get_scatter_class,
+    update_figure,
+    update_hover,
+    update_html,
+)
+from rmviewer.utils.parallel import render_solutions
+from rmviewer.utils.profiling import profiled, span
 
 MAX_MARKER = 20
 MIN_MARKER = 10
 
 
 def get_size_markers(list_prob):
-    min_prob = min(list_prob)
-    max_prob = max(list_prob)
-
-    size_markers = []
-    for prob in list_prob:
-        if max_prob == min_prob:
-            size_markers.append(MIN_MARKER)
+    list_prob = np.asarray(list_prob, dtype=np.float64)
+    if len(list_prob) == 0:
+        return list_prob
+
+    min_prob = list_prob.min()
+    max_prob = list_prob.max()
+    if max_prob == min_prob:
+        return np.full(len(list_prob), MIN_MARKER, dtype=np.float64)
+
+    return MIN_MARKER + (list_prob - min_prob) * (MAX_MARKER - MIN_MARKER) / (max_prob - min_prob)
+
+
+def get_probability_groups(prob_rms, solutions):
+    """
+    Groups the RM probabilities by solution once, for the lookups of every solution.
+
+    :param dataframe prob_rms: Probability of each representative model
+    :param list solutions: Solution IDs to be plotted
+    :return: Probabilities of each solution, in the order of the file
+    """
+    prob_rms = prob_rms[prob_rms["solution_id"].isin(solutions)]
+    groups = group_rows(prob_rms["solution_id"].to_numpy(), prob_rms["probability"].to_numpy())
+    return {solution: probabilities for solution, (probabilities,) in groups.items()}
+
+
+@profiled("aggregate:backgrounds")
+def get_backgrounds(dataset, variable_list, options=None):
+    """
+    Pre-aggregated "Models" layers, computed once per pair of variables for all solutions.
+
+    With the ``density`` background the models are binned in a 2D histogram, and with
+    ``decimate`` they are reduced by stratified sampling that keeps the sparse regions. The
+    default ``raw`` background draws every model, so nothing is computed.
+
+    :param dataframe dataset: Models
+    :param list variable_list: Pairs of variables to be plotted
+    :param dict options: Output options
+    :return: Background layer of each pair of variables
+    """
+    options = options or {}
+    mode = options.get("background", "raw")
+    bins = options.get("background_bins", BACKGROUND_BINS)
+    max_points = options.get("background_max_points", BACKGROUND_MAX_POINTS)
+
+    backgrounds = {}
+    if mode == "raw":
+        return backgrounds
+
+    for x, y in variable_list:
+        if (x, y) in backgrounds:
+            continue
+        x_values = dataset[x].to_numpy()
+        y_values = dataset[y].to_numpy()
+        if mode == "density":
+            backgrounds[(x, y)] = {"type": "density", **bin_density(x_values, y_values, bins)}
         else:
-            size_markers.append(
-                MIN_MARKER + (prob - min_prob) * (MAX_MARKER - MIN_MARKER) / (max_prob - min_prob)
-            )
+            kept = decimate(x_values, y_values, max_points, bins)
+            backgrounds[(x, y)] = {"type": "decimate", "x": x_values[kept], "y": y_values[kept]}
 
-    return size_markers
+    return backgrounds
 
 
-def generate_cross_plot(params, rms, showlegend, solution_id):
-    x_values = params["df"][params["x"]]
-    y_values = params["df"][params["y"]]
+def add_background(fig, params, x_values, y_values, showlegend):
+    background = params.get("backgrounds", {}).get((params["x"], params["y"]))
+
+    if background is not None and background["type"] == "density":
+        fig.add_trace(
+            go.Heatmap(
+                x=background["x"],
+                y=background["y"],
+                z=background["z"],
+                colorscale="Greys",
+                zmin=0,
+                showscale=False,
+                name="Models",
+                legendgroup="Models",
+                showlegend=showlegend,
+                hovertemplate="%{x}<br>%{y}<br>Models: %{z}<extra></extra>",
+            )
+        )
+        return fig
 
-    fig = go.Figure()
+    if background is not None:
+        x_values = background["x"]
+        y_values = background["y"]
 
+    scatter = get_scatter_class(len(x_values), params.get("options"))
     fig.add_trace(
-        go.Scatter(
+        scatter(
             x=x_values,
             y=y_values,
             mode="markers",
@@ -42,77 +129,108 @@ def generate_cross_plot(params, rms, showlegend, solution_id):
             showlegend=showlegend,
         )
     )
+    return fig
 
-    rms_x = [x_values[i] for i in rms]
-    rms_y = [y_values[i] for i in rms]
 
-    rms_probability = [
-        rm
-        for sol, rm in zip(
-            params["probability_list"]["solution_id"],
-            params["probability_list"]["probability"],
-            strict=False,
-        )
-        if sol == solution_id
-    ]
-    sorted_colors = get_colors(rms)
-    size_markers = get_size_markers(rms_probability)
+def get_params(var, config):
+    return {
+        "x": var["x"],
+        "y": var["y"],
+        "df": config["dataset"],
+        "probability_list": config.get("probability_list", {}),
+        "options": config.get("options"),
+        "backgrounds": config.get("backgrounds", {}),
+        "index": config.get("index"),
+    }
 
-    for i, (x_val, y_val) in enumerate(zip(rms_x, rms_y, strict=False)):
-        fig.add_trace(
-            go.Scatter(
-                x=[x_val],
-                y=[y_val],
-                mode="markers",
-                marker={
-                    "color": sorted_colors[i] if sorted_colors else "#FF6F00",
-                    "size": size_markers[i] if size_markers else 10,
-                    "symbol": "circle",
-                },
-                showlegend=showlegend,
-                name=f"RM {rms[i]}",
-                legendgroup=f"RM_{rms[i]}",
-            )
-        )
 
-    return fig
+@profiled("figure:crossplot_template")
+def get_template(vars_, config):
+    """
+    Layout and "Models" background of the crossplots, built once for all solutions.
 
+    :param list vars_: Subplots
+    :param dict config: Dataset, options and pre-aggregated backgrounds
+    :return: Figure template
+    """
+    values_columns = len(vars_)
+    rows = math.ceil(values_columns / 2)
+    fig = make_subplots(
+        rows=math.ceil(values_columns / 2),
+        cols=2,
+        subplot_titles=[var["title"] for var in vars_],
+        vertical_spacing=max(0.05, 0.25 / rows),
+        horizontal_spacing=0.1,
+    )
 
-def add_figure(vars_, fig, rms, solution_id, config):
     legend_shown = True
-
     for var in vars_:
-        params = {
-            "x": var["x"],
-            "y": var["y"],
-            "df": config["dataset"],
-            "probability_list": config["probability_list"],
-        }
-        mini_fig = generate_cross_plot(params, rms, legend_shown, solution_id)
+        params = get_params(var, config)
+        x_values = params["df"][params["x"]]
+        y_values = params["df"][params["y"]]
+        mini_fig = add_background(go.Figure(), params, x_values, y_values, legend_shown)
 
         for trace in mini_fig.data:
             fig.add_trace(trace, row=var["row"], col=var["col"])
 
         legend_shown = False
 
-    return fig
+    fig = update_figure(vars_, fig, values_columns)
+    fig = update_hover(fig)
+    subplots = [(var["row"], var["col"]) for var in vars_]
+    return get_figure_template(fig, subplots, config.get("options"))
+
+
+def generate_cross_plot(params, rms, showlegend, solution_id):
+    x_values = params["df"][params["x"]]
+    y_values = params["df"][params["y"]]
+
+    positions = params["index"].model_positions(rms)
+    rms_x = x_values.to_numpy()[positions]
+    rms_y = y_values.to_numpy()[positions]
+
+    rms_probability = params["probability_list"].get(solution_id, [])
+    if 0 < len(rms_probability) < len(rms):
+        raise ValueError(
+            f"prob_rms has {len(rms_probability)} probabilities for the {len(rms)} RMs of "
+            f"solution {solution_id}"
+        )
+    sorted_colors = get_colors(rms)
+    size_markers = get_size_markers(rms_probability)[: len(rms)]
+
+    rms_markers = {
+        "id": rms,
+        "x": rms_x,
+        "y": rms_y,
+        "color": [sorted_colors[i] if sorted_colors else "#FF6F00" for i in range(len(rms_x))],
+        "size": size_markers.tolist() if len(size_markers) else [10] * len(rms_x),
+    }
+    return get_rm_traces(rms_markers, showlegend, params.get("options"))
+
+
+def get_overlays(vars_, rms, solution_id, config):
+    legend_shown = True
+
+    overlays = []
+    for var in vars_:
+        params = get_params(var, config)
+        overlays.append(generate_cross_plot(params, rms, legend_shown, solution_id))
+
+        legend_shown = False
+
+    return overlays
+
+
+@profiled("figure:crossplot")
+def add_figure(vars_, rms, solution_id, config):
+    return build_figure(config["template"], get_overlays(vars_, rms, solution_id, config))
 
 
 def show_figure(rms, vars_, charts_path, info_solutions, config):
-    values_columns = len(vars_)
-    rows = math.ceil(values_columns / 2)
-    fig = make_subplots(
-        rows=math.ceil(values_columns / 2),
-        cols=2,
-        subplot_titles=[var["title"] for var in vars_],
-        vertical_spacing=max(0.05, 0.25 / rows),
-        horizontal_spacing=0.1,
-    )
-    fig = add_figure(vars_, fig, rms, info_solutions[1], config)
-    fig = update_figure(vars_, fig, values_columns)
+    fig = add_figure(vars_, rms, info_solutions[1], config)
 
     name_file = "cross_plot.html"
-    update_html(charts_path, info_solutions[0], fig, name_file)
+    update_html(charts_path, info_solutions[0], fig, name_file, config.get("options"))
 
 
 def convert_list(variable_list):
@@ -136,29 +254,68 @@ def convert_list(variable_list):
     return vars_
 
 
-def generate_cross_plot_chart(results, config):
+def render_solution(context, task):
+    rms, path_solution, solution = task
+    list_vars = convert_list(context["variable_list"])
+    show_figure(rms, list_vars, context["charts_path"], (path_solution, solution), context)
+
+
+def get_context(variable_list, solutions, config):
+    """
+    Data shared by the crossplots of every solution: the RM probabilities grouped by solution
+    and the figure template.
+
+    :param list variable_list: Pairs of variables to be plotted
+    :param list solutions: Solution IDs to be plotted
+    :param dict config: Dataset, RM probabilities (``prob_rms``), index, options and charts
+        directory (``output_path``)
+    :return: Context of ``add_figure``
+    """
     dataset = config.get("dataset")
+    options = config.get("options", {})
+    context = {
+        "dataset": dataset,
+        "probability_list": get_probability_groups(config.get("prob_rms"), solutions),
+        "variable_list": variable_list,
+        "charts_path": config.get("output_path"),
+        "options": options,
+        "index": config["index"],
+    }
+    context["template"] = get_template(
+        convert_list(variable_list),
+        {**context, "backgrounds": get_backgrounds(dataset, variable_list, options)},
+    )
+    return context
+
+
+def generate_cross_plot_chart(results, config):
     solutions_ids = config.get("solutions")
     variable_list = config.get("variable_list")
     charts_path = config.get("output_path")
-    probability_list = config.get("prob_rms")
-
-    df_rm = results[results["solution_id"].isin(solutions_ids)]
+    workers = config.get("workers", 1)
+    options = config.get("options", {})
+    index = config.get("index") or DatasetIndex(config.get("dataset"), results)
 
     path_solutions = [f"best_sol_{i + 1}_id_{id_}" for i, id_ in enumerate(solutions_ids)]
 
-    rms = df_rm.filter(regex="^RM")
-    rms = rms.values.tolist()
-    config = {"dataset": dataset, "probability_list": probability_list}
+    context = get_context(variable_list, solutions_ids, {**config, "index": index})
 
-    for index, solution in enumerate(solutions_ids):
+    tasks = [
+        (index.get_rms(solution), path_solutions[i], solution)
+        for i, solution in enumerate(solutions_ids)
+    ]
+    if options.get("output_mode", "solutions") == "dashboard":
         list_vars = convert_list(variable_list)
-        show_figure(
-            rms[index],
-            list_vars,
-            charts_path,
-            (path_solutions[index], solution),
-            config,
-        )
+        with span("figure:crossplot_dashboard"):
+            overlays = [
+                get_overlays(list_vars, rms, solution, context) for rms, _, solution in tasks
+            ]
+            fig = build_dashboard(context["template"], overlays, path_solutions)
+        update_html(charts_path, "", fig, "cross_plot.html", options)
+    else:
+        targets = config.get("targets")
+        if targets is not None:
+            tasks = [task for task in tasks if task[1] in targets]
+        render_solutions(render_solution, context, tasks, workers)
 
     Logger().log_info(f"Crossplots generated in: {charts_path}")
@@ -1,83 +1,173 @@
 import math
 
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from rmviewer.context.dataset_index import DatasetIndex
 from rmviewer.logger.custom_logger import Logger
-from rmviewer.utils.figures import get_colors, update_figure, update_html
+from rmviewer.utils.figures import (
+    build_dashboard,
+    build_figure,
+    get_colors,
+    get_figure_template,
+    get_rm_traces,
+    get_scatter_class,
+    update_figure,
+    update_hover,
+    update_html,
+)
+from rmviewer.utils.parallel import render_solutions
+from rmviewer.utils.profiling import profiled, span
 
 SPACING_DEFAULT = 0.05
 MAX_ROW = 0.5
 MIN_ROW = 0.1
 
 
-def generate_risk_curve(var, context, rms=None, show_legend=False, rms_y=None):
-    df_models = context["dataset"]
-    df_prob = context["models_cumulative_prob"]
+@profiled("index:sorted_variables")
+def get_sorted_variables(dataset, models_cumulative_prob, variables):
+    """
+    Sorts the models by each variable once, to be reused by every solution.
+
+    :param dataframe dataset: Models
+    :param dataframe models_cumulative_prob: Cumulative probability of models
+    :param list variables: Variables to be plotted
+    :return: For each variable, the sorted values (``x``), the model IDs in that order
+        (``ids``), the position in that order of each dataset row (``rank``) and the
+        cumulative probabilities in descending order (``prob``)
+    """
+    sorted_variables = {}
+    ids = dataset["ID"].to_numpy()
+    for var in dict.fromkeys(variables):
+        values = dataset[var].to_numpy()
+        order = np.argsort(values, kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        prob = models_cumulative_prob[var].to_numpy()
+        sorted_variables[var] = {
+            "x": values[order],
+            "ids": ids[order],
+            "rank": rank,
+            "prob": prob[np.argsort(-prob, kind="stable")],
+        }
+    return sorted_variables
+
+
+def get_step_line(x, y):
+    """
+    Coordinates of the step line through the RMs.
+
+    Each RM contributes three points on its x value: the midpoint to the previous RM (1 for
+    the first one), the RM itself and the midpoint to the next RM (0 for the last one).
+
+    :param array x: RM values in ascending order
+    :param array y: RM cumulative probabilities in descending order
+    :return: X and Y coordinates of the line
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)[: len(x)]
+    if len(x) == 0:
+        return x, y
+
+    midpoints = (y[:-1] + y[1:]) / 2
+    previous = np.concatenate(([1.0], midpoints))
+    following = np.concatenate((midpoints, [0.0]))
+
+    line_x = np.repeat(x, 3)
+    line_y = np.column_stack((previous, y, following)).ravel()
+    return line_x, line_y
+
+
+def get_models_trace(var, context, show_legend=False):
+    sorted_variable = context["sorted_variables"][var["x"]]
+    x_values = sorted_variable["x"]
+
+    scatter = get_scatter_class(len(x_values), context.get("options"))
+    return scatter(
+        x=x_values,
+        y=sorted_variable["prob"],
+        mode="markers",
+        marker={"color": "black", "size": 4},
+        name="Models",
+        legendgroup="Models",
+        showlegend=show_legend,
+    )
 
-    x_values = df_models.sort_values(by=var["x"])
-    y_values = df_prob.sort_values(by=var["x"], ascending=False)
 
-    fig = go.Figure()
+def get_spacing(rows):
+    vertical_spacing = SPACING_DEFAULT
 
-    fig.add_trace(
-        go.Scatter(
-            x=x_values[var["x"]],
-            y=y_values[var["x"]],
-            mode="markers",
-            marker={"color": "black", "size": 4},
-            name="Models",
-            legendgroup="Models",
-            showlegend=show_legend,
-        )
-    )
+    if 1 / rows >= MAX_ROW:
+        vertical_spacing = 0.1
+    elif 1 / rows >= MIN_ROW:
+        vertical_spacing = 0.05
+    elif vertical_spacing >= (1 / (rows - 1)):
+        vertical_spacing = 0.01
+    else:
+        vertical_spacing = 0.01
 
-    rms_x = x_values.loc[x_values["ID"].isin(rms)]
-    rms_sorted = rms_x.sort_values(by=var["x"])
+    return vertical_spacing
 
-    sorted_colors = get_colors(rms_sorted["ID"])
 
-    rms_x_sorted = rms_sorted[var["x"]].values
-    if rms_y is not None:
-        rms_y_sorted = rms_y.sort_values(by=var["x"], ascending=False)[var["x"]].values
-    else:
-        rms_y_sorted = []
+@profiled("figure:risk_curve_template")
+def get_template(variables, context):
+    """
+    Layout and "Models" background of the risk curves, built once for all solutions.
+
+    :param list variables: Subplots
+    :param dict context: Sorted variables and options
+    :return: Figure template
+    """
+    values_columns = len(variables)
+    rows = math.ceil(values_columns / 2)
+
+    fig = make_subplots(
+        rows=math.ceil(values_columns / 2),
+        cols=2,
+        vertical_spacing=get_spacing(rows),
+        horizontal_spacing=0.1,
+    )
+
+    legend_shown = True
+    for var in variables:
+        fig.add_trace(
+            get_models_trace(var, context, show_legend=legend_shown),
+            row=var["row"],
+            col=var["col"],
+        )
+        legend_shown = False
 
-    line_x, line_y = [], []
-    marker_x, marker_y = [], []
+    fig = update_figure(variables, fig, values_columns)
+    fig = update_hover(fig)
+
+    total_height = max(500, rows * 500)
+    fig.update_layout(height=total_height)
 
-    for i in range(len(rms_x_sorted)):
-        x_val = rms_x_sorted[i]
-        y_val = rms_y_sorted[i]
+    subplots = [(var["row"], var["col"]) for var in variables]
+    return get_figure_template(fig, subplots, context.get("options"))
 
-        if i == 0:
-            line_x.append(x_val)
-            line_y.append(1)
-        else:
-            prev_y_val = rms_y_sorted[i - 1]
-            midpoint_prev_y = (y_val + prev_y_val) / 2
-            midpoint_prev_x = x_val
 
-            line_x.append(midpoint_prev_x)
-            line_y.append(midpoint_prev_y)
+def generate_risk_curve(var, context, rms=None, show_legend=False, rms_y=None):
+    sorted_variable = context["sorted_variables"][var["x"]]
+    x_values = sorted_variable["x"]
+    traces = []
 
-        line_x.append(x_val)
-        line_y.append(y_val)
+    positions = context["index"].model_positions(rms, strict=False)
+    selected = np.unique(sorted_variable["rank"][positions[positions >= 0]])
+    rms_ids = sorted_variable["ids"][selected]
+    rms_x_sorted = x_values[selected]
 
-        if i < len(rms_x_sorted) - 1:
-            next_y_val = rms_y_sorted[i + 1]
-            midpoint_next_y = (y_val + next_y_val) / 2
-            midpoint_next_x = x_val
+    sorted_colors = get_colors(rms_ids)
 
-            line_x.append(midpoint_next_x)
-            line_y.append(midpoint_next_y)
-        else:
-            line_x.append(x_val)
-            line_y.append(0)
+    if rms_y is not None:
+        rms_y_values = rms_y[var["x"]].to_numpy()
+        rms_y_sorted = rms_y_values[np.argsort(-rms_y_values, kind="stable")]
+    else:
+        rms_y_sorted = np.array([])
 
-        marker_x.append(x_val)
-        marker_y.append(y_val)
+    line_x, line_y = get_step_line(rms_x_sorted, rms_y_sorted)
 
-    fig.add_trace(
+    traces.append(
         go.Scatter(
             x=line_x,
             y=line_y,
@@ -89,85 +179,49 @@ def generate_risk_curve(var, context, rms=None, show_legend=False, rms_y=None):
         )
     )
 
-    rms_points = [
-        {
-            "id": int(rm_id),
-            "x": x,
-            "y": y,
-            "color": sorted_colors[i] if sorted_colors else "#FF6F00",
-        }
-        for i, (rm_id, x, y) in enumerate(zip(rms_sorted["ID"], marker_x, marker_y, strict=False))
-    ]
-
-    rms_points_sorted = sorted(rms_points, key=lambda point: point["id"])
-
-    for point in rms_points_sorted:
-        fig.add_trace(
-            go.Scatter(
-                x=[point["x"]],
-                y=[point["y"]],
-                mode="markers",
-                marker={
-                    "color": point["color"],
-                    "size": 10,
-                    "symbol": "circle",
-                },
-                showlegend=show_legend,
-                name=f"RM {point['id']}",
-                legendgroup=f"RM_{point['id']}",
-            )
-        )
+    by_id = np.argsort(rms_ids, kind="stable")
+    rms_markers = {
+        "id": rms_ids[by_id].astype(int).tolist(),
+        "x": rms_x_sorted[by_id],
+        "y": rms_y_sorted[: len(rms_ids)][by_id],
+        "color": [sorted_colors[i] if sorted_colors else "#FF6F00" for i in by_id],
+        "size": [10] * len(rms_ids),
+    }
+    traces.extend(get_rm_traces(rms_markers, show_legend, context.get("options")))
 
-    return fig
+    return traces
 
 
-def add_figure(variables, fig, rms, sol_id, context):
+def get_overlays(variables, rms, sol_id, context):
     legend_shown = True
     rms_y = context["rms_cumulative_prob"]
     rms_y = rms_y[rms_y["solution_id"] == sol_id]
 
+    overlays = []
     for var in variables:
-        mini_fig = generate_risk_curve(
-            var, rms=rms, context=context, show_legend=legend_shown, rms_y=rms_y
+        overlays.append(
+            generate_risk_curve(
+                var, rms=rms, context=context, show_legend=legend_shown, rms_y=rms_y
+            )
         )
 
-        for trace in mini_fig.data:
-            fig.add_trace(trace, row=var["row"], col=var["col"])
-
         legend_shown = False
 
-    return fig
-
-
-def show_figure(rms, variables, params, context):
-    values_columns = len(variables)
-    rows = math.ceil(values_columns / 2)
-    vertical_spacing = SPACING_DEFAULT
+    return overlays
 
-    if 1 / rows >= MAX_ROW:
-        vertical_spacing = 0.1
-    elif 1 / rows >= MIN_ROW:
-        vertical_spacing = 0.05
-    elif vertical_spacing >= (1 / (rows - 1)):
-        vertical_spacing = 0.01
-    else:
-        vertical_spacing = 0.01
 
-    fig = make_subplots(
-        rows=math.ceil(values_columns / 2),
-        cols=2,
-        vertical_spacing=vertical_spacing,
-        horizontal_spacing=0.1,
-    )
+@profiled("figure:risk_curve")
+def add_figure(variables, rms, sol_id, context):
+    return build_figure(context["template"], get_overlays(variables, rms, sol_id, context))
 
-    fig = add_figure(variables, fig, rms, params["sol_id"], context)
-    fig = update_figure(variables, fig, values_columns)
 
-    total_height = max(500, rows * 500)
-    fig.update_layout(height=total_height)
+def show_figure(rms, variables, params, context):
+    fig = add_figure(variables, rms, params["sol_id"], context)
 
     name_file = "risk_curve.html"
-    update_html(params["charts_path"], params["path_solutions"], fig, name_file)
+    update_html(
+        params["charts_path"], params["path_solutions"], fig, name_file, context.get("options")
+    )
 
 
 def convert_list(variable_list):
@@ -186,41 +240,73 @@ def convert_list(variable_list):
     return variables
 
 
-def generate_risk_curve_chart(results, config):
-    solution_ids = config["solution_ids"]
-    charts_path = config["charts_path"]
-    variables = config["variables"]
-    models_cumulative_prob = config["models_cumulative_prob"]
-    rms_cumulative_prob = config["rms_cumulative_prob"]
-    dataset = config["dataset"]
+def render_solution(context, task):
+    rms, params = task
+    variables_list = convert_list(context["variables"])
+    show_figure(rms, variables_list, params, context)
+
 
+def get_context(variables, config):
+    """
+    Data shared by the risk curves of every solution: the models sorted by each variable and
+    the figure template.
+
+    :param list variables: Variables to be plotted
+    :param dict config: Dataset, cumulative probabilities of the models and of the RMs, index
+        and options
+    :return: Context of ``add_figure``
+    """
+    dataset = config["dataset"]
+    models_cumulative_prob = config["models_cumulative_prob"]
     context = {
         "models_cumulative_prob": models_cumulative_prob,
-        "rms_cumulative_prob": rms_cumulative_prob,
+        "rms_cumulative_prob": config["rms_cumulative_prob"],
         "dataset": dataset,
+        "variables": list(variables),
+        "options": config.get("options", {}),
+        "sorted_variables": get_sorted_variables(dataset, models_cumulative_prob, variables),
+        "index": config["index"],
     }
-    df = results[results["solution_id"].isin(solution_ids)]
+    context["template"] = get_template(convert_list(context["variables"]), context)
+    return context
 
-    path_solutions = [
-        f"best_sol_{i + 1}_id_{id_solution}" for i, id_solution in enumerate(solution_ids)
-    ]
+
+def generate_risk_curve_chart(results, config):
+    solution_ids = config["solution_ids"]
+    charts_path = config["charts_path"]
+    variables = config["variables"]
+    workers = config.get("workers", 1)
+    options = config.get("options", {})
+    index = config.get("index") or DatasetIndex(config["dataset"], results)
+
+    context = get_context(variables, {**config, "index": index})
 
     path_solutions = [
         f"best_sol_{i + 1}_id_{id_solution}" for i, id_solution in enumerate(solution_ids)
     ]
 
-    variable_list = list(variables)
-
-    rms = df.filter(regex="^RM")
-    rms = rms.values.tolist()
-
-    for index, sol_id in enumerate(solution_ids):
-        variables_list = convert_list(variable_list)
+    tasks = []
+    for i, sol_id in enumerate(solution_ids):
         params = {
             "charts_path": charts_path,
-            "path_solutions": path_solutions[index],
+            "path_solutions": path_solutions[i],
             "sol_id": sol_id,
         }
-        show_figure(rms[index], variables_list, params, context)
+        tasks.append((index.get_rms(sol_id), params))
+
+    if options.get("output_mode", "solutions") == "dashboard":
+        variables_list = convert_list(context["variables"])
+        with span("figure:risk_curve_dashboard"):
+            overlays = [
+                get_overlays(variables_list, rms, params["sol_id"], context)
+                for rms, params in tasks
+            ]
+            fig = build_dashboard(context["template"], overlays, path_solutions)
+        update_html(charts_path, "", fig, "risk_curve.html", options)
+    else:
+        targets = config.get("targets")
+        if targets is not None:
+            tasks = [task for task in tasks if task[1]["path_solutions"] in targets]
+        render_solutions(render_solution, context, tasks, workers)
 
     Logger().log_info(f"Risk curves generated in: {charts_path}")
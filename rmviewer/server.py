@@ -0,0 +1,297 @@
+import json
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, cast
+from urllib.parse import parse_qs, urlsplit
+
+from plotly.offline import get_plotlyjs
+from plotly.subplots import make_subplots
+
+from rmviewer.context.data_loader import get_input_files, load_config, load_df
+from rmviewer.logger.custom_logger import Logger
+from rmviewer.plots import attribute_levels, convergence, cross_plot, risk_curve
+from rmviewer.utils.figures import PLOTLYJS_FILE, get_centered_html
+from rmviewer.utils.lru_cache import LRUCache
+from rmviewer.utils.profiling import span
+from rmviewer.viewer import RMViewer
+
+CHARTS = ("crossplot", "risk_curve", "histogram", "convergence")
+TEMPLATE_CACHE_SIZE = 16
+
+
+class RequestError(Exception):
+    """
+    Invalid request, answered with an HTTP error status.
+    """
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ChartService:
+    """
+    Renders the charts of a project on demand, with the input files kept in memory.
+
+    The input files are loaded once, with every column, so any variable of the dataset can
+    be requested. The data shared by the solutions of a chart (figure templates, sorted
+    variables, grouped probabilities) is built once per set of variables, and the rendered
+    pages are kept in an LRU cache.
+    """
+
+    def __init__(self, config_path: Path, cache_size: int = 128):
+        """
+        :param path config_path: Path to config file (JSON)
+        :param int cache_size: Number of rendered pages kept in memory
+        """
+        self.config = load_config(config_path)
+        self.plots = self.config.get("plot", {})
+        project_path = Path(self.config["project_path"])
+        options = self.config.get("options", {})
+        memory_map = options.get("memory_map", False)
+
+        self.data = {}
+        for key, relative_path in get_input_files(self.config).items():
+            with span(f"load:{key}"):
+                self.data[key] = load_df(project_path, relative_path, memory_map, options=options)
+
+        self.viewer = RMViewer(
+            solutions=self.config["solutions"],
+            dataset=self.data["dataset"],
+            solutions_results=self.data["solutions_results"],
+            options=self.config.get("options", {}),
+        )
+        self.pages = LRUCache(cache_size)
+        self.contexts = LRUCache(TEMPLATE_CACHE_SIZE)
+        self._plotlyjs = None
+
+    @property
+    def plotlyjs(self) -> bytes:
+        if self._plotlyjs is None:
+            self._plotlyjs = get_plotlyjs().encode("utf-8")
+        return self._plotlyjs
+
+    def describe(self) -> dict[str, Any]:
+        """
+        Charts, solutions and variables that can be requested, and the cache statistics.
+        """
+        variables = [column for column in self.data["dataset"].columns if column != "ID"]
+        return {
+            "charts": [chart for chart in CHARTS if self.plots.get(chart)],
+            "solutions": self.viewer.solutions,
+            "variables": variables,
+            "cache": {
+                "pages": len(self.pages),
+                "max_pages": self.pages.max_size,
+                "hits": self.pages.hits,
+                "misses": self.pages.misses,
+            },
+        }
+
+    def _get_solution(self, query: dict[str, list[str]]) -> int:
+        value = query.get("solution", [None])[0]
+        if value is None:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Missing parameter: solution")
+        try:
+            solution = int(value)
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid solution: {value}") from None
+        if not self.viewer.index.has_solution(solution):
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Solution not found: {solution}")
+        return solution
+
+    def _get_variables(self, query: dict[str, list[str]], default: list, keys: tuple[str, ...]):
+        """
+        Variables of the request (``variables=A,B`` or, for pairs, ``variables=A:B,A:C``),
+        checked against the columns of the given input files.
+        """
+        value = query.get("variables", [None])[0]
+        if value is None:
+            return default
+        variables = [item.split(":") if ":" in item else item for item in value.split(",")]
+        names = {name for item in variables for name in ([item] if isinstance(item, str) else item)}
+        for key in keys:
+            missing = sorted(names - set(self.data[key].columns))
+            if missing:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"Variables not found: {missing}")
+        return variables
+
+    def _render_crossplot(self, query):
+        solution = self._get_solution(query)
+        pairs = self._get_variables(query, self.plots["crossplot"]["variable_list"], ("dataset",))
+        if any(isinstance(pair, str) or len(pair) != 2 for pair in pairs):  # noqa: PLR2004
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Crossplot variables must be pairs (X:Y)")
+        pairs = tuple(tuple(pair) for pair in pairs)
+
+        def render():
+            context = self.contexts.get(
+                ("crossplot", pairs),
+                lambda: cross_plot.get_context(
+                    [list(pair) for pair in pairs],
+                    self.data["prob_rms"]["solution_id"].unique(),
+                    {**self.data, "index": self.viewer.index, "options": self.viewer.options},
+                ),
+            )
+            rms = self.viewer.index.get_rms(solution)
+            fig = cross_plot.add_figure(cross_plot.convert_list(pairs), rms, solution, context)
+            return get_centered_html(fig, include_plotlyjs=f"/{PLOTLYJS_FILE}")
+
+        return self.pages.get(("crossplot", solution, pairs), render)
+
+    def _render_risk_curve(self, query):
+        solution = self._get_solution(query)
+        variables = self._get_variables(
+            query,
+            self.plots["risk_curve"]["variables"],
+            ("dataset", "models_cumulative_prob", "rms_cumulative_prob"),
+        )
+        if not all(isinstance(variable, str) for variable in variables):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Risk curve variables must be single")
+        variables = tuple(variables)
+
+        def render():
+            context = self.contexts.get(
+                ("risk_curve", variables),
+                lambda: risk_curve.get_context(
+                    variables,
+                    {**self.data, "index": self.viewer.index, "options": self.viewer.options},
+                ),
+            )
+            rms = self.viewer.index.get_rms(solution)
+            fig = risk_curve.add_figure(risk_curve.convert_list(variables), rms, solution, context)
+            return get_centered_html(fig, include_plotlyjs=f"/{PLOTLYJS_FILE}")
+
+        return self.pages.get(("risk_curve", solution, variables), render)
+
+    def _render_histogram(self, query):
+        solution = self._get_solution(query)
+        results = self.data["results"]
+        levels = self.contexts.get(
+            ("histogram",),
+            lambda: attribute_levels.get_attribute_levels(results, results["SOLUTION_ID"].unique()),
+        )
+        if solution not in levels:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"No attribute levels of solution {solution}")
+
+        def render():
+            fig = attribute_levels.get_figure(levels[solution])
+            return get_centered_html(fig, width="800px", include_plotlyjs=f"/{PLOTLYJS_FILE}")
+
+        return self.pages.get(("histogram", solution), render)
+
+    def _render_convergence(self, _query):
+        section = self.plots["convergence"]
+
+        def render():
+            fig = make_subplots(rows=1, cols=1)
+            fig = convergence.add_figure(
+                convergence.VARIABLES,
+                fig,
+                self.viewer.solutions_results,
+                section["of_name"],
+                section.get("sense", "minimize"),
+            )
+            fig = convergence.update_figure(convergence.VARIABLES, fig)
+            return get_centered_html(fig, include_plotlyjs=f"/{PLOTLYJS_FILE}")
+
+        return self.pages.get(("convergence",), render)
+
+    def render(self, chart: str, query: dict[str, list[str]]) -> bytes:
+        """
+        Page of a chart.
+
+        :param str chart: Chart name (key of the ``plot`` section)
+        :param dict query: Parameters of the request (``solution`` and ``variables``)
+        :return: HTML page
+        """
+        if chart not in CHARTS:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown chart: {chart}")
+        if not self.plots.get(chart):
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Chart not configured: {chart}")
+        with span(f"serve:{chart}"):
+            page = getattr(self, f"_render_{chart}")(query)
+        return page.encode("utf-8")
+
+
+class ChartRequestHandler(BaseHTTPRequestHandler):
+    """
+    Routes of the chart server:
+
+    - ``/``: charts, solutions and variables that can be requested (JSON)
+    - ``/crossplot?solution=<id>&variables=<x>:<y>,...``
+    - ``/risk_curve?solution=<id>&variables=<variable>,...``
+    - ``/histogram?solution=<id>``
+    - ``/convergence``
+    - ``/plotly.min.js``: plotly.js library, referenced by every page
+    """
+
+    server_version = "RMViewer"
+
+    def _send(self, status: HTTPStatus, content_type: str, body: bytes, max_age: int = 0):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if max_age:
+            self.send_header("Cache-Control", f"max-age={max_age}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: HTTPStatus, content: dict[str, Any]):
+        self._send(status, "application/json", json.dumps(content).encode("utf-8"))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        route = url.path.strip("/")
+        service = cast("ChartServer", self.server).service
+        try:
+            if not route:
+                self._send_json(HTTPStatus.OK, service.describe())
+            elif route == PLOTLYJS_FILE:
+                self._send(HTTPStatus.OK, "text/javascript", service.plotlyjs, max_age=86400)
+            else:
+                page = service.render(route, parse_qs(url.query))
+                self._send(HTTPStatus.OK, "text/html; charset=utf-8", page)
+        except RequestError as ex:
+            self._send_json(ex.status, {"error": ex.message})
+        except Exception as ex:
+            Logger().log_error(f"Error rendering {self.path}: {ex}")
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(ex)})
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        Logger().log_info(f"{self.address_string()} - {format % args}")
+
+
+class ChartServer(ThreadingHTTPServer):
+    """
+    HTTP server answering each request in a thread of its own, with a shared chart service.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: ChartService):
+        self.service = service
+        super().__init__(address, ChartRequestHandler)
+
+
+def serve(config_path: Path, host: str = "127.0.0.1", port: int = 8050, cache_size: int = 128):
+    """
+    Loads a project once and serves its charts over HTTP until stopped with Ctrl+C.
+
+    :param path config_path: Path to config file (JSON)
+    :param str host: Address to listen on
+    :param int port: Port to listen on (0 picks a free port)
+    :param int cache_size: Number of rendered pages kept in memory
+    """
+    service = ChartService(config_path, cache_size)
+    server = ChartServer((host, port), service)
+    Logger().log_info(
+        f"Serving charts on http://{host}:{server.server_port}/ (press Ctrl+C to stop)"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        Logger().log_info("Server stopped")
+    finally:
+        server.server_close()
@@ -0,0 +1,133 @@
+import numpy as np
+
+BACKGROUND_BINS = 200
+BACKGROUND_MAX_POINTS = 50_000
+
+
+def _get_cells(x, y, bins):
+    """
+    Assigns each point to a cell of a regular grid covering the data.
+
+    :param array x: X coordinates (finite values only)
+    :param array y: Y coordinates (finite values only)
+    :param int bins: Number of bins along each axis
+    :return: Cell index of each point
+    """
+    cells = []
+    for values in (x, y):
+        low, high = values.min(), values.max()
+        if high > low:
+            index = ((values - low) / (high - low) * bins).astype(np.int64)
+            cells.append(np.clip(index, 0, bins - 1))
+        else:
+            cells.append(np.zeros(len(values), dtype=np.int64))
+    return cells[0] * bins + cells[1]
+
+
+def _get_quota(counts, max_points):
+    """
+    Largest number of points kept per cell so that no more than ``max_points`` are kept.
+
+    Every occupied cell keeps at least one point, so the number of occupied cells must not be
+    greater than ``max_points`` (see ``decimate``).
+
+    :param array counts: Number of points in each cell
+    :param int max_points: Maximum number of points kept
+    :return: Number of points kept per cell
+    """
+    low, high = 1, int(counts.max())
+    while low < high:
+        middle = (low + high + 1) // 2
+        if np.minimum(counts, middle).sum() <= max_points:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def decimate(x, y, max_points=BACKGROUND_MAX_POINTS, bins=BACKGROUND_BINS, seed=0):
+    """
+    Stratified decimation of a scatter.
+
+    Points are grouped in the cells of a ``bins`` x ``bins`` grid and dense cells are sampled
+    down to the same quota of points, while sparse cells (the outliers and the tails of the
+    distribution) keep all of their points. Every occupied cell keeps at least one point, so
+    when there are more occupied cells than ``max_points`` the grid is made coarser (halving
+    the bins) until they fit. At most ``max_points`` points are kept. Sampling uses a fixed
+    seed, so the same points are kept in every run.
+
+    :param array x: X coordinates
+    :param array y: Y coordinates
+    :param int max_points: Maximum number of points kept
+    :param int bins: Number of bins along each axis
+    :param int seed: Seed of the random sampling
+    :return: Sorted positions of the points kept
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    positions = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    if len(positions) <= max_points:
+        return positions
+
+    cells = _get_cells(x[positions], y[positions], bins)
+    counts = np.bincount(cells, minlength=bins * bins)
+    while np.count_nonzero(counts) > max_points:
+        bins //= 2
+        cells = _get_cells(x[positions], y[positions], bins)
+        counts = np.bincount(cells, minlength=bins * bins)
+    quota = _get_quota(counts, max_points)
+
+    # Random order inside each cell, then rank of each point within its cell
+    shuffled = np.random.default_rng(seed).permutation(len(positions))
+    order = shuffled[np.argsort(cells[shuffled], kind="stable")]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.arange(len(order)) - starts[cells[order]]
+
+    return np.sort(positions[order[rank < quota]])
+
+
+def bin_density(x, y, bins=BACKGROUND_BINS):
+    """
+    2D histogram of a scatter, to be drawn as a heatmap.
+
+    Empty cells are NaN, so they are transparent in the heatmap.
+
+    :param array x: X coordinates
+    :param array y: Y coordinates
+    :param int bins: Number of bins along each axis
+    :return: Dictionary with bin centers (``x``, ``y``) and counts (``z``, rows along y)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(x) & np.isfinite(y)
+
+    counts, x_edges, y_edges = np.histogram2d(x[finite], y[finite], bins=bins)
+    z = counts.T
+    z[z == 0] = np.nan
+
+    return {
+        "x": (x_edges[:-1] + x_edges[1:]) / 2,
+        "y": (y_edges[:-1] + y_edges[1:]) / 2,
+        "z": z,
+    }
+
+
+def group_rows(keys, *columns):
+    """
+    Groups the rows of some columns by key in a single stable sort.
+
+    :param array keys: Key of each row
+    :param array columns: Columns (or 2D blocks of columns) to be grouped
+    :return: For each key, the rows of each column in the original order
+    """
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return {}
+
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    groups = [np.split(np.asarray(column)[order], starts) for column in columns]
+
+    first_keys = keys[np.concatenate(([0], starts))].tolist()
+    return {key: tuple(group[i] for group in groups) for i, key in enumerate(first_keys)}
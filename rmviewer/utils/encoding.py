@@ -0,0 +1,117 @@
+import base64
+
+import numpy as np
+
+DATA_KEYS = ("x", "y", "z")
+
+# Integer types decoded by plotly.js, from the smallest
+INTEGER_TYPES = (np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32)
+
+# Significant digits kept by single precision floats
+SINGLE_PRECISION_DIGITS = 7
+
+
+def decode_array(values):
+    """
+    Array of trace data, decoding base64 typed arrays.
+
+    :param values: List, array or typed array (``dtype``, ``bdata`` and ``shape``)
+    :return: NumPy array
+    """
+    if isinstance(values, dict) and "bdata" in values:
+        array = np.frombuffer(base64.b64decode(values["bdata"]), dtype=values["dtype"])
+        if "shape" in values:
+            array = array.reshape([int(size) for size in str(values["shape"]).split(",")])
+        return array
+    return np.asarray(values)
+
+
+def round_significant(values, digits):
+    """
+    Rounds the values to a number of significant digits.
+
+    :param array values: Float values
+    :param int digits: Number of significant digits
+    :return: Rounded values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    magnitude = np.zeros(values.shape)
+    nonzero = np.isfinite(values) & (values != 0)
+    magnitude[nonzero] = np.floor(np.log10(np.abs(values[nonzero])))
+    factor = 10.0 ** (digits - 1 - magnitude)
+    return np.round(values * factor) / factor
+
+
+def to_typed_array(array):
+    """
+    Base64 typed array of plotly.js, with the smallest integer type that holds the values.
+
+    :param array array: Numeric array
+    :return: Typed array (``dtype``, ``bdata`` and, for 2D arrays, ``shape``)
+    """
+    if array.dtype.kind in "iub":
+        low, high = (array.min(), array.max()) if array.size else (0, 0)
+        for integer_type in INTEGER_TYPES:
+            info = np.iinfo(integer_type)
+            if info.min <= low and high <= info.max:
+                array = array.astype(integer_type)
+                break
+        else:
+            array = array.astype(np.float64)
+
+    array = np.ascontiguousarray(array)
+    typed_array = {
+        "dtype": array.dtype.str.lstrip("<>|="),
+        "bdata": base64.b64encode(array.tobytes()).decode("ascii"),
+    }
+    if array.ndim > 1:
+        typed_array["shape"] = ", ".join(str(size) for size in array.shape)
+    return typed_array
+
+
+def encode_array(values, options=None):
+    """
+    Trace data encoded as configured in the output options.
+
+    Float values are stored in single precision with ``float32``, and with
+    ``significant_digits`` they are rounded, and stored in single precision when it holds
+    that many digits (up to 7). With ``typed_arrays`` the data is returned as a base64 typed
+    array; without it, lists stay lists of JSON numbers and arrays are written as typed arrays
+    by plotly. Data that already was a typed array stays one. Non-numeric data is returned
+    unchanged.
+
+    :param values: List, array or typed array
+    :param dict options: Output options
+    :return: Encoded data
+    """
+    options = options or {}
+    array = decode_array(values)
+    if array.dtype.kind not in "iubf" or array.ndim == 0:
+        return values
+
+    typed = options.get("typed_arrays", False) or isinstance(values, dict)
+    if array.dtype.kind == "f":
+        digits = options.get("significant_digits", 0)
+        if digits:
+            array = round_significant(array, digits)
+        if options.get("float32", False) or 0 < digits <= SINGLE_PRECISION_DIGITS:
+            array = array.astype(np.float32)
+
+    return to_typed_array(array) if typed else array
+
+
+def encode_trace(trace, options=None):
+    """
+    Trace dictionary with its ``x``, ``y`` and ``z`` data encoded.
+
+    :param dict trace: Trace dictionary
+    :param dict options: Output options
+    :return: Encoded trace dictionary (the same one when there is nothing to encode)
+    """
+    options = options or {}
+    if not any(options.get(key) for key in ("typed_arrays", "float32", "significant_digits")):
+        return trace
+    return {
+        key: encode_array(value, options) if key in DATA_KEYS and value is not None else value
+        for key, value in trace.items()
+    }
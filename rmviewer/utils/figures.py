@@ -1,11 +1,26 @@
 import math
+import os
+import threading
 from pathlib import Path
 
 import plotly.colors as p_colors
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+from rmviewer.context.manifest import PLOTLYJS_FILE
+from rmviewer.utils.encoding import encode_trace
+from rmviewer.utils.profiling import span
 
+HTML_CONFIG = {"displayModeBar": True, "scrollZoom": True}
+WEBGL_THRESHOLD = 100_000
+DASHBOARD_MENU_HEIGHT = 60
 
-def get_html_centered_content(content, width="1200px"):
-    return f"""
+# Shared plotly.js files already checked by this process
+_shared_plotlyjs = set()
+
+
+def get_html_centered_parts(width="1200px"):
+    header = f"""
     <html>
     <head>
         <style>
@@ -25,11 +40,101 @@ def get_html_centered_content(content, width="1200px"):
     </head>
     <body>
         <div class="plotly-container">
-            {content}
+            """
+    footer = """
         </div>
     </body>
     </html>
     """
+    return header, footer
+
+
+def get_html_centered_content(content, width="1200px"):
+    header, footer = get_html_centered_parts(width)
+    return f"{header}{content}{footer}"
+
+
+def write_shared_plotlyjs(charts_path):
+    """
+    Writes the plotly.js bundle to the charts directory, if not already there.
+
+    The file is written to a temporary name and then renamed, so concurrent writers never
+    leave a partial bundle behind.
+
+    :param path charts_path: Charts directory
+    :return: Path to the shared plotly.js file
+    """
+    js_path = Path(charts_path) / PLOTLYJS_FILE
+    if js_path in _shared_plotlyjs:
+        return js_path
+
+    bundle = get_plotlyjs().encode("utf-8")
+    if not js_path.is_file() or js_path.stat().st_size != len(bundle):
+        js_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = js_path.with_name(f".{PLOTLYJS_FILE}.{os.getpid()}.{threading.get_ident()}")
+        temp_path.write_bytes(bundle)
+        temp_path.replace(js_path)
+
+    _shared_plotlyjs.add(js_path)
+    return js_path
+
+
+def get_plotlyjs_source(charts_path, html_path, options=None):
+    """
+    Tells how the chart loads plotly.js, as expected by ``include_plotlyjs`` of plotly.
+
+    With the ``shared`` mode of the ``plotlyjs`` option, a single bundle is written to the
+    charts directory and referenced by a relative path, so charts still work offline.
+
+    :param path charts_path: Charts directory
+    :param path html_path: Output HTML file
+    :param dict options: Output options
+    :return: True to embed the library, or the relative path to the shared bundle
+    """
+    if (options or {}).get("plotlyjs", "embed") != "shared":
+        return True
+    js_path = write_shared_plotlyjs(charts_path)
+    return Path(os.path.relpath(js_path, Path(html_path).parent)).as_posix()
+
+
+def write_centered_html(fig, html_path, width="1200px", include_plotlyjs=True):
+    """
+    Writes the figure centered in the page with a single write of the file.
+
+    The figure is rendered once in memory and the page parts are written straight to the
+    file, instead of writing the figure, reading it back and writing the wrapped page.
+
+    :param fig: Plotly figure, or figure dictionary (written without validation)
+    :param path html_path: Output HTML file
+    :param str width: Width of the figure container
+    :param include_plotlyjs: Embed plotly.js (True) or path of the script to reference
+    """
+    header, footer = get_html_centered_parts(width)
+    with span("serialize:html"):
+        content = pio.to_html(
+            fig, config=HTML_CONFIG, include_plotlyjs=include_plotlyjs, validate=False
+        )
+
+    with span("write:html"), Path(html_path).open("w", encoding="utf-8") as file:
+        file.write(header)
+        file.write(content)
+        file.write(footer)
+
+
+def get_centered_html(fig, width="1200px", include_plotlyjs=True):
+    """
+    Page with the figure centered, as written by ``write_centered_html``.
+
+    :param fig: Plotly figure, or figure dictionary (rendered without validation)
+    :param str width: Width of the figure container
+    :param include_plotlyjs: Embed plotly.js (True) or path of the script to reference
+    :return: HTML page
+    """
+    with span("serialize:html"):
+        content = pio.to_html(
+            fig, config=HTML_CONFIG, include_plotlyjs=include_plotlyjs, validate=False
+        )
+    return get_html_centered_content(content, width)
 
 
 def update_figure(vars_, fig, values_columns):
@@ -55,22 +160,235 @@ def update_figure(vars_, fig, values_columns):
     return fig
 
 
-def update_html(charts_path, path_solutions, fig, name_file):
+def get_figure_template(fig, subplots, options=None):
+    """
+    Parts of a figure shared by the charts of every solution, built once.
+
+    The figure holds the layout and the background traces of each subplot. It is converted
+    to plain dictionaries once, so the charts of each solution only build their own overlay
+    traces and the background is neither rebuilt nor validated again. The trace data is
+    encoded as set in the output options (see ``encode_trace``).
+
+    :param figure fig: Figure with the layout and the background traces
+    :param list subplots: Row and column of each subplot
+    :param dict options: Output options
+    :return: Layout (``layout``), axis references (``axes``), background traces
+        (``backgrounds``) of each subplot and output options (``options``)
+    """
+    fig_dict = fig.to_dict()
+
+    axes = []
+    for row, col in subplots:
+        subplot = fig.get_subplot(row, col)
+        axes.append(
+            (
+                subplot.xaxis.plotly_name.replace("axis", ""),
+                subplot.yaxis.plotly_name.replace("axis", ""),
+            )
+        )
+
+    backgrounds = {refs: [] for refs in axes}
+    for trace in fig_dict["data"]:
+        refs = (trace.get("xaxis", "x"), trace.get("yaxis", "y"))
+        backgrounds.setdefault(refs, []).append(encode_trace(trace, options))
+
+    return {
+        "layout": fig_dict["layout"],
+        "axes": axes,
+        "backgrounds": [backgrounds[refs] for refs in axes],
+        "options": options,
+    }
+
+
+def get_overlay_data(template, overlays):
+    """
+    Overlay traces placed in the subplots of the template.
+
+    :param dict template: Figure template (see ``get_figure_template``)
+    :param list overlays: Overlay traces of each subplot, in the order of the subplots
+    :return: Trace dictionaries of each subplot
+    """
+    options = template.get("options")
+    return [
+        [
+            encode_trace({**trace.to_plotly_json(), "xaxis": x_ref, "yaxis": y_ref}, options)
+            for trace in traces
+        ]
+        for (x_ref, y_ref), traces in zip(template["axes"], overlays, strict=True)
+    ]
+
+
+def build_figure(template, overlays):
+    """
+    Figure of a solution, made of the template and the overlay traces of the solution.
+
+    :param dict template: Figure template (see ``get_figure_template``)
+    :param list overlays: Overlay traces of each subplot, in the order of the subplots
+    :return: Figure dictionary
+    """
+    data = []
+    for background, traces in zip(
+        template["backgrounds"], get_overlay_data(template, overlays), strict=True
+    ):
+        data.extend(background)
+        data.extend(traces)
+    return {"data": data, "layout": template["layout"]}
+
+
+def build_dashboard(template, overlays, labels):
+    """
+    Figure with the charts of several solutions, selected in a dropdown menu.
+
+    The background traces of the template are stored once and always visible, while the
+    menu only switches the visibility of the overlay traces of each solution.
+
+    :param dict template: Figure template (see ``get_figure_template``)
+    :param list overlays: Overlay traces of each subplot, for each solution
+    :param list labels: Name of each solution in the menu
+    :return: Figure dictionary
+    """
+    data = [trace for background in template["backgrounds"] for trace in background]
+    backgrounds = len(data)
+
+    owners = []
+    for index, solution_overlays in enumerate(overlays):
+        for traces in get_overlay_data(template, solution_overlays):
+            for trace in traces:
+                data.append({**trace, "visible": index == 0})
+                owners.append(index)
+
+    buttons = [
+        {
+            "label": label,
+            "method": "restyle",
+            "args": [{"visible": [True] * backgrounds + [owner == index for owner in owners]}],
+        }
+        for index, label in enumerate(labels)
+    ]
+    margin = template["layout"].get("margin", {})
+    layout = {
+        **template["layout"],
+        "margin": {**margin, "t": margin.get("t", 70) + DASHBOARD_MENU_HEIGHT},
+        "updatemenus": [
+            {
+                "buttons": buttons,
+                "active": 0,
+                "direction": "down",
+                "showactive": True,
+                "x": 0,
+                "xanchor": "left",
+                "y": 1,
+                "yanchor": "bottom",
+                "pad": {"b": DASHBOARD_MENU_HEIGHT // 2},
+            }
+        ],
+    }
+    return {"data": data, "layout": layout}
+
+
+def update_html(charts_path, path_solutions, fig, name_file, options=None):
+    """
+    Writes the chart of a solution to its directory.
+
+    :param path charts_path: Charts directory
+    :param str path_solutions: Directory of the solution
+    :param fig: Plotly figure or figure dictionary
+    :param str name_file: Name of the HTML file
+    :param dict options: Output options
+    """
     path = charts_path / Path(path_solutions)
     path.mkdir(parents=True, exist_ok=True)
 
-    config = {"displayModeBar": True, "scrollZoom": True}
-
     html_path = path / Path(name_file)
-    fig.write_html(html_path, config=config)
+    include_plotlyjs = get_plotlyjs_source(charts_path, html_path, options)
+    write_centered_html(fig, html_path, include_plotlyjs=include_plotlyjs)
 
-    with Path(html_path).open(encoding="utf-8") as file:
-        content = file.read()
 
-    centered_content = get_html_centered_content(content)
+def use_webgl(n_points, options=None) -> bool:
+    """
+    Tells if the background scatter must be drawn with WebGL instead of SVG.
+
+    :param int n_points: Number of points of the scatter
+    :param dict options: Output options (``render_backend`` and ``webgl_threshold``)
+    :return: True to draw with WebGL
+    """
+    options = options or {}
+    backend = options.get("render_backend", "auto")
+    if backend == "auto":
+        return n_points > options.get("webgl_threshold", WEBGL_THRESHOLD)
+    return backend == "webgl"
+
+
+def get_scatter_class(n_points, options=None):
+    """
+    Gets the scatter trace class for the configured render backend.
+
+    :param int n_points: Number of points of the scatter
+    :param dict options: Output options
+    :return: go.Scattergl when drawing with WebGL, go.Scatter otherwise
+    """
+    return go.Scattergl if use_webgl(n_points, options) else go.Scatter
+
+
+def update_hover(fig):
+    """
+    Hover settings for figures with WebGL scatters.
+
+    WebGL traces only answer hover events fast when looking for the closest point, so the
+    closest point is shown, with its coordinates and trace name as in the SVG traces.
+
+    :param figure fig: Plotly figure
+    """
+    if any(trace.type == "scattergl" for trace in fig.data):
+        fig.update_layout(hovermode="closest")
+        fig.update_traces(hoverinfo="x+y+name", selector={"type": "scattergl"})
+    return fig
+
+
+def get_rm_traces(rms, showlegend, options=None):
+    """
+    Marker traces of the representative models of a subplot.
+
+    By default each RM is a trace of its own, with its own legend entry. With the ``batched``
+    mode of the ``rm_traces`` option all RMs are drawn by a single trace with per-point colors
+    and sizes, a single legend entry and the RM identified in the hover label, which keeps the
+    number of traces low when there are many RMs and subplots.
+
+    :param dict rms: ID (``id``), coordinates (``x`` and ``y``), marker color (``color``) and
+        marker size (``size``) of each RM
+    :param bool showlegend: Show the RMs in the legend
+    :param dict options: Output options
+    :return: List of traces
+    """
+    if (options or {}).get("rm_traces", "individual") == "batched":
+        return [
+            go.Scatter(
+                x=list(rms["x"]),
+                y=list(rms["y"]),
+                mode="markers",
+                marker={"color": list(rms["color"]), "size": list(rms["size"])},
+                text=[f"RM {rm_id}" for rm_id in rms["id"]],
+                hovertemplate="%{text}<br>(%{x}, %{y})<extra></extra>",
+                showlegend=showlegend,
+                name="RMs",
+                legendgroup="RMs",
+            )
+        ]
 
-    with Path(html_path).open("w", encoding="utf-8") as file:
-        file.write(centered_content)
+    return [
+        go.Scatter(
+            x=[x_val],
+            y=[y_val],
+            mode="markers",
+            marker={"color": color, "size": size, "symbol": "circle"},
+            showlegend=showlegend,
+            name=f"RM {rm_id}",
+            legendgroup=f"RM_{rm_id}",
+        )
+        for rm_id, x_val, y_val, color, size in zip(
+            rms["id"], rms["x"], rms["y"], rms["color"], rms["size"], strict=True
+        )
+    ]
 
 
 def get_colors(rms) -> list:
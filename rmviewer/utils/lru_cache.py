@@ -0,0 +1,49 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class LRUCache:
+    """
+    Thread-safe cache keeping the most recently used values.
+
+    Values are created outside the lock, so slow creations do not block the lookups of other
+    threads; two threads missing the same key at once may both create the value.
+    """
+
+    def __init__(self, max_size: int = 128):
+        """
+        :param int max_size: Maximum number of values kept
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._values: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: Hashable, create: Callable[[], Any]) -> Any:
+        """
+        Value of a key, created and stored if it is not cached.
+
+        :param key: Cache key
+        :param callable create: Creates the value of the key
+        :return: Cached or created value
+        """
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                self.hits += 1
+                return self._values[key]
+            self.misses += 1
+
+        value = create()
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+        return value
@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from rmviewer.utils.profiling import add_spans, drain_spans, enable_profiling, get_origin
+
+# Shared, read-only context of the worker process (set once by the pool initializer)
+_worker_context: Any = None
+
+
+def _init_worker(context: Any, profile_origin: float | None = None) -> None:
+    global _worker_context  # noqa: PLW0603
+    _worker_context = context
+    if profile_origin is not None:
+        # Spans relative to the start of the run in the main process, as its own spans
+        enable_profiling(origin=profile_origin)
+
+
+def _run_task(render: Callable[[Any, Any], None], task: Any) -> list[dict[str, Any]]:
+    render(_worker_context, task)
+    # Spans recorded by the worker, sent back to be reported with the spans of the run
+    return drain_spans()
+
+
+def _get_mp_context(render: Callable[[Any, Any], None]):
+    """
+    Gets the multiprocessing context used by the process pool.
+
+    Charts may be rendered while other threads are running (see ``TaskScheduler``), where
+    forking is unsafe, so the fork server is used when available. The module of the render
+    function is preloaded by the server, so the workers start with plotly already imported.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context()
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([render.__module__])
+    return context
+
+
+def get_workers(workers: int) -> int:
+    """
+    Resolves the number of worker processes.
+
+    :param int workers: Requested number of workers, 0 uses all available CPUs
+    :return: Number of worker processes
+    """
+    if workers == 0:
+        return os.cpu_count() or 1
+    return max(workers, 1)
+
+
+def render_solutions(
+    render: Callable[[Any, Any], None], context: Any, tasks: list[Any], workers: int = 1
+) -> None:
+    """
+    Renders the per-solution charts, in a process pool when more than one worker is requested.
+
+    The context (datasets shared by every solution) is sent once to each worker process and
+    only the solution-specific task is sent per chart. ``render`` must be a module-level
+    function so it can be sent to the workers.
+
+    :param callable render: Function called as ``render(context, task)``
+    :param any context: Data shared by every task
+    :param list tasks: Solution-specific arguments, one per chart
+    :param int workers: Number of worker processes, 0 uses all available CPUs
+    """
+    workers = min(get_workers(workers), len(tasks))
+    if workers <= 1:
+        for task in tasks:
+            render(context, task)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=_get_mp_context(render),
+        initializer=_init_worker,
+        initargs=(context, get_origin()),
+    ) as executor:
+        futures = [executor.submit(_run_task, render, task) for task in tasks]
+        try:
+            for future in futures:
+                add_spans(future.result())
+        except Exception:
+            # Same as the serial path: stop at the first failing chart
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
@@ -0,0 +1,193 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from rmviewer.logger.custom_logger import Logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Spans are only recorded when profiling is enabled (``--profile``)
+_enabled = False
+_origin = time.perf_counter()
+_spans: list[dict[str, Any]] = []
+_lock = threading.Lock()
+_stack = threading.local()
+
+
+def _max_rss() -> int | None:
+    """
+    Peak resident set size of the process, in bytes (None where it is not available).
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def enable_profiling(enabled: bool = True, origin: float | None = None) -> None:
+    """
+    Starts (or stops) recording the instrumentation spans of this process.
+
+    :param bool enabled: Record the spans
+    :param float origin: ``perf_counter`` value the span start times are relative to, now by
+        default. Worker processes use the origin of the main process, so their spans are on
+        the same timeline (``perf_counter`` is a system-wide clock on Linux, macOS and
+        Windows).
+    """
+    global _enabled, _origin  # noqa: PLW0603
+    _enabled = enabled
+    _origin = time.perf_counter() if origin is None else origin
+
+
+def get_origin() -> float | None:
+    """
+    Origin of the span start times, None when profiling is disabled.
+    """
+    return _origin if _enabled else None
+
+
+@contextmanager
+def span(name: str):
+    """
+    Instrumentation span of a stage of the run.
+
+    Records the wall time and the CPU time of the thread running the stage. Memory is only
+    measured per process: the span records the peak resident set size of the process at the
+    end of the stage, which includes the stages that ran before it, and how much the stage
+    raised that peak. Spans started inside another span of the same thread keep its name as
+    ``parent``. Nothing is recorded when profiling is disabled.
+
+    :param str name: Stage name, as ``<stage>:<detail>``
+    """
+    if not _enabled:
+        yield
+        return
+
+    parents = getattr(_stack, "names", None)
+    if parents is None:
+        parents = _stack.names = []
+    parent = parents[-1] if parents else None
+    parents.append(name)
+
+    rss = _max_rss()
+    start = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        cpu = time.thread_time() - cpu
+        peak = _max_rss()
+        parents.pop()
+        record = {
+            "name": name,
+            "parent": parent,
+            "start_s": start - _origin,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "process_peak_rss_bytes": peak,
+            "peak_rss_growth_bytes": None if rss is None or peak is None else peak - rss,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+        }
+        with _lock:
+            _spans.append(record)
+
+
+def profiled(name: str):
+    """
+    Decorator recording each call of the function as a span (see ``span``).
+
+    :param str name: Stage name
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def drain_spans() -> list[dict[str, Any]]:
+    """
+    Removes and returns the spans recorded so far (used to collect the spans of workers).
+    """
+    with _lock:
+        spans = list(_spans)
+        _spans.clear()
+    return spans
+
+
+def add_spans(spans: list[dict[str, Any]]) -> None:
+    """
+    Adds spans recorded by another process.
+    """
+    if spans:
+        with _lock:
+            _spans.extend(spans)
+
+
+def get_summary(spans: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Totals of the spans of each stage, slowest stages first.
+
+    :param list spans: Spans
+    :return: Number of calls, total wall and CPU times, largest raise of the process peak
+        memory and process peak memory at the end of each stage
+    """
+    stages: dict[str, dict[str, Any]] = {}
+    for record in spans:
+        stage = stages.setdefault(
+            record["name"],
+            {
+                "name": record["name"],
+                "calls": 0,
+                "wall_s": 0.0,
+                "cpu_s": 0.0,
+                "peak_rss_growth_bytes": 0,
+                "process_peak_rss_bytes": 0,
+            },
+        )
+        stage["calls"] += 1
+        stage["wall_s"] += record["wall_s"]
+        stage["cpu_s"] += record["cpu_s"]
+        for key in ("peak_rss_growth_bytes", "process_peak_rss_bytes"):
+            stage[key] = max(stage[key], record[key] or 0)
+    return sorted(stages.values(), key=lambda stage: stage["wall_s"], reverse=True)
+
+
+def write_profile(path: Path) -> None:
+    """
+    Writes the spans recorded so far and their summary to a JSON file and logs the summary.
+
+    :param path path: Metrics file (JSON)
+    """
+    with _lock:
+        spans = sorted(_spans, key=lambda record: record["start_s"])
+    summary = get_summary(spans)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"summary": summary, "spans": spans}, indent=1), encoding="utf-8")
+
+    Logger().log_info(f"Profile ({len(spans)} spans) written to: {path}")
+    for stage in summary:
+        growth = stage["peak_rss_growth_bytes"] / 2**20
+        peak = stage["process_peak_rss_bytes"] / 2**20
+        Logger().log_info(
+            f"  {stage['name']}: {stage['calls']} call(s), wall {stage['wall_s']:.3f}s, "
+            f"cpu {stage['cpu_s']:.3f}s, peak growth {growth:.1f} MiB "
+            f"(process peak {peak:.1f} MiB)"
+        )
@@ -0,0 +1,101 @@
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
+
+from rmviewer.logger.custom_logger import Logger
+
+
+class TaskScheduler:
+    """
+    Runs named tasks in a thread pool as soon as the tasks they depend on are finished.
+
+    Each task receives the results of its dependencies as keyword arguments named after the
+    dependencies. Start and end times of every task are kept to report a timeline.
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        """
+        :param int max_workers: Maximum number of tasks running at once (None runs every ready
+            task at once, 1 runs the tasks one after another in the order they were added)
+        """
+        self.max_workers = max_workers
+        self.tasks: dict[str, tuple[Callable[..., Any], tuple[str, ...]]] = {}
+        self.timeline: dict[str, tuple[float, float]] = {}
+
+    def add_task(
+        self, name: str, func: Callable[..., Any], depends_on: tuple[str, ...] = ()
+    ) -> None:
+        """
+        Adds a task to the scheduler.
+
+        :param str name: Unique task name, also used as keyword for the dependent tasks
+        :param callable func: Function called with the results of the dependencies
+        :param tuple depends_on: Names of the tasks that must finish before this one starts
+        """
+        if name in self.tasks:
+            raise ValueError(f"Task '{name}' was already added.")
+        missing = [dep for dep in depends_on if dep not in self.tasks]
+        if missing:
+            raise ValueError(f"Task '{name}' depends on unknown tasks: {missing}")
+        self.tasks[name] = (func, tuple(depends_on))
+
+    def _run_task(self, name: str, start: float, kwargs: dict[str, Any]) -> Any:
+        func, _ = self.tasks[name]
+        task_start = time.perf_counter() - start
+        try:
+            return func(**kwargs)
+        finally:
+            self.timeline[name] = (task_start, time.perf_counter() - start)
+
+    def run(self) -> dict[str, Any]:
+        """
+        Runs every task, honoring their dependencies.
+
+        The first exception raised by a task is raised again once the running tasks are
+        finished; tasks that were not started yet are dropped.
+
+        :return: Result of each task
+        """
+        results: dict[str, Any] = {}
+        pending = dict(self.tasks)
+        running: dict[Future, str] = {}
+        start = time.perf_counter()
+        workers = self.max_workers or max(len(self.tasks), 1)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                ready = [
+                    name
+                    for name, (_, deps) in pending.items()
+                    if all(dep in results for dep in deps)
+                ]
+                for name in ready:
+                    _, deps = pending.pop(name)
+                    kwargs = {dep: results[dep] for dep in deps}
+                    running[executor.submit(self._run_task, name, start, kwargs)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        pending.clear()
+                        wait(running)
+                        raise error
+                    results[name] = future.result()
+
+        return results
+
+    def log_timeline(self) -> None:
+        """
+        Logs the start, end and duration of each task, relative to the start of the run.
+        """
+        if not self.timeline:
+            return
+        total = max(end for _, end in self.timeline.values())
+        Logger().log_info(f"Execution timeline ({total:.2f}s):")
+        for name, (task_start, task_end) in sorted(self.timeline.items(), key=lambda i: i[1]):
+            Logger().log_info(
+                f"  {name}: {task_start:.2f}s -> {task_end:.2f}s ({task_end - task_start:.2f}s)"
+            )
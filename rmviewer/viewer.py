@@ -1,13 +1,34 @@
+import importlib
 from pathlib import Path
 
 import pandas as pd
 
+from rmviewer.context.dataset_index import DatasetIndex
 from rmviewer.logger.custom_logger import Logger
-from rmviewer.plots.attribute_levels import generate_attribute_levels_chart
-from rmviewer.plots.convergence import convergence_chart
-from rmviewer.plots.cross_plot import generate_cross_plot_chart
-from rmviewer.plots.risk_curve import generate_risk_curve_chart
 from rmviewer.utils.decorators import log_exceptions
+from rmviewer.utils.profiling import profiled, span
+
+# Module of each chart (key of the ``plot`` section), imported when the chart is generated
+CHART_MODULES = {
+    "crossplot": "rmviewer.plots.cross_plot",
+    "risk_curve": "rmviewer.plots.risk_curve",
+    "histogram": "rmviewer.plots.attribute_levels",
+    "convergence": "rmviewer.plots.convergence",
+}
+
+
+def import_charts(charts: list[str]) -> None:
+    """
+    Imports the modules of the given charts (and plotly with them).
+
+    The chart modules are imported by the first call of their ``RMViewer.generate_*`` method;
+    importing them beforehand keeps the imports out of the threads generating the charts.
+
+    :param list charts: Chart names (keys of the ``plot`` section)
+    """
+    for chart in charts:
+        with span(f"import:{chart}"):
+            importlib.import_module(CHART_MODULES[chart])
 
 
 class RMViewer:
@@ -15,22 +36,37 @@ class RMViewer:
     Main class for Representative Model Viewer.
     """
 
-    def __init__(self, solutions=None, dataset=None, solutions_results=None):
+    def __init__(
+        self, solutions=None, dataset=None, solutions_results=None, workers=1, options=None
+    ):
         """
         Initializes the RMViewer class.
 
-        Loads the solution IDs, the dataset and the optimization results.
+        Loads the solution IDs, the dataset and the optimization results, and indexes the
+        models by ID and the results by solution ID for the lookups of every chart.
 
+        :param int workers: Number of processes rendering the per-solution charts
+            (1 renders serially, 0 uses all available CPUs)
+        :param dict options: Output options (the ``options`` object of the configuration)
         """
         self.solutions = solutions
         self.dataset = dataset
         self.solutions_results = solutions_results
+        self.workers = workers
+        self.options = options or {}
+        with span("index:dataset"):
+            self.index = DatasetIndex(dataset, solutions_results)
 
         Logger().log_info("Charts will be generated to visualize the results")
 
     @log_exceptions("Error generating cross plot")
+    @profiled("chart:crossplot")
     def generate_crossplot(
-        self, variable_list: list[list[str]], prob_rms: pd.DataFrame, output_path: Path
+        self,
+        variable_list: list[list[str]],
+        prob_rms: pd.DataFrame,
+        output_path: Path,
+        targets: set[str] | None = None,
     ) -> None:
         """
         Generation of cross plot.
@@ -38,6 +74,7 @@ class RMViewer:
         :param list variable_list: Pairs of variables to be plotted
         :param dataframe prob_rms: Probability of each representative model
         :param path output_path: Path where files will be saved
+        :param set targets: Solution directories to be written, None writes every solution
         """
         config = {
             "dataset": self.dataset,
@@ -45,18 +82,26 @@ class RMViewer:
             "variable_list": variable_list,
             "output_path": output_path,
             "prob_rms": prob_rms,
+            "targets": targets,
+            "index": self.index,
+            "workers": self.workers,
+            "options": self.options,
         }
         Logger().log_info(f"Generating crossplots with variables: {variable_list}")
 
+        from rmviewer.plots.cross_plot import generate_cross_plot_chart  # noqa: PLC0415
+
         generate_cross_plot_chart(self.solutions_results, config)
 
     @log_exceptions("Error generating risk curve")
+    @profiled("chart:risk_curve")
     def generate_risk_curve(
         self,
         models_cumulative_prob: pd.DataFrame,
         rms_cumulative_prob: pd.DataFrame,
         output_path: Path,
         variables: list[str],
+        targets: set[str] | None = None,
     ) -> None:
         """
         Generation of risk curve.
@@ -65,6 +110,7 @@ class RMViewer:
         :param dataframe rms_cumulative_prob: Cumulative probability of RMs
         :param path output_path: Path where files will be saved
         :param list variable_list: List of variables to be plotted
+        :param set targets: Solution directories to be written, None writes every solution
         """
         config = {
             "solution_ids": self.solutions,
@@ -72,34 +118,61 @@ class RMViewer:
             "variables": variables,
             "models_cumulative_prob": models_cumulative_prob,
             "rms_cumulative_prob": rms_cumulative_prob,
+            "targets": targets,
             "dataset": self.dataset,
+            "index": self.index,
+            "workers": self.workers,
+            "options": self.options,
         }
         Logger().log_info(f"Generating risk curves with variables: {variables}")
 
+        from rmviewer.plots.risk_curve import generate_risk_curve_chart  # noqa: PLC0415
+
         generate_risk_curve_chart(self.solutions_results, config)
 
     @log_exceptions("Error generating histogram")
-    def generate_histogram(self, results: pd.DataFrame, output_path: Path) -> None:
+    @profiled("chart:histogram")
+    def generate_histogram(
+        self, results: pd.DataFrame, output_path: Path, targets: set[str] | None = None
+    ) -> None:
         """
         Generation of histogram.
 
         :param dataframe results: Result of the evaluation of the attribute level
         :param path output_path: Path where files will be saved
+        :param set targets: Solution directories to be written, None writes every solution
         """
         Logger().log_info("Generating histograms")
 
+        from rmviewer.plots.attribute_levels import generate_attribute_levels_chart  # noqa: PLC0415
+
         generate_attribute_levels_chart(
-            self.solutions_results, self.solutions, results, output_path
+            self.solutions_results,
+            self.solutions,
+            results,
+            output_path,
+            {
+                "index": self.index,
+                "workers": self.workers,
+                "options": self.options,
+                "targets": targets,
+            },
         )
 
     @log_exceptions("Error generating convergence chart")
-    def generate_convergence_chart(self, output_path: Path, of_name: str = "of_value") -> None:
+    @profiled("chart:convergence")
+    def generate_convergence_chart(
+        self, output_path: Path, of_name: str = "of_value", sense: str = "minimize"
+    ) -> None:
         """
         Generation of solution convergence chart.
 
         :param path output_path: Path where files will be saved
         :param str of_value: OF name from results file
+        :param str sense: Optimization sense, "minimize" or "maximize"
         """
         Logger().log_info("Generating convergence chart")
 
-        convergence_chart(self.solutions_results, output_path, of_name)
+        from rmviewer.plots.convergence import convergence_chart  # noqa: PLC0415
+
+        convergence_chart(self.solutions_results, output_path, of_name, self.options, sense)
@@ -0,0 +1,163 @@
+import io
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from plotly.subplots import make_subplots
+
+from rmviewer import data_validation
+from rmviewer.context.data_loader import load_config
+from rmviewer.logger.custom_logger import Logger
+from rmviewer.plots.convergence import (
+    VARIABLES,
+    add_improvements,
+    update_improvements,
+    write_figure,
+)
+
+BLOCK_SIZE = 64 * 1024 * 1024
+POLL_INTERVAL = 1.0
+
+
+class SolutionsTail:
+    """
+    Reads the rows appended to a CSV file since the last read.
+
+    The byte offset of the last complete line is kept, so each read only parses the new rows.
+    A partial last line (still being written) is left for the next read. While the file is
+    missing (replaced by a rename, for instance) there are no new rows.
+    """
+
+    def __init__(self, path: Path, columns: list[str]):
+        """
+        :param path path: CSV file
+        :param list columns: Columns to be parsed
+        """
+        self.path = Path(path)
+        self.columns = columns
+        self.names: list[str] | None = None
+        self.offset = 0
+
+    def _read_header(self, file) -> None:
+        header = file.readline()
+        if not header.endswith(b"\n"):
+            return
+        self.names = pd.read_csv(io.BytesIO(header)).columns.to_list()
+        missing = [column for column in self.columns if column not in self.names]
+        if missing:
+            print(f"ERROR - Columns not found in {self.path}: {missing}")
+            sys.exit(1)
+        self.offset = file.tell()
+
+    def truncated(self) -> bool:
+        """
+        Tells if the file shrank (rewritten from scratch), in which case the next read starts
+        again from the beginning of the file.
+        """
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return False
+        if size >= self.offset:
+            return False
+        self.names = None
+        self.offset = 0
+        return True
+
+    def read(self):
+        """
+        Parses the complete rows appended since the last read.
+
+        :return: DataFrames with the new rows, in blocks of at most ``BLOCK_SIZE`` bytes
+        """
+        try:
+            file = self.path.open("rb")
+        except OSError:
+            return
+        with file:
+            if self.names is None:
+                self._read_header(file)
+            names = self.names
+            if names is None:
+                return
+            file.seek(self.offset)
+            while block := file.read(BLOCK_SIZE):
+                end = block.rfind(b"\n") + 1
+                if end == 0:
+                    break
+                self.offset += end
+                file.seek(self.offset)
+                yield pd.read_csv(
+                    io.BytesIO(block[:end]),
+                    header=None,
+                    names=names,
+                    usecols=pd.Index(self.columns),
+                )
+
+
+def watch_convergence(config_path: Path, interval: float = 60.0, rows: int = 0) -> None:
+    """
+    Keeps the convergence chart updated while the optimizer appends solutions.
+
+    The solutions file is tailed and the improvements are updated with the new rows only.
+    The chart is written again when ``interval`` seconds have passed or ``rows`` new rows
+    were read since the last update, and only if new rows were read. Stops with Ctrl+C.
+
+    :param path config_path: Path to config file (JSON)
+    :param float interval: Seconds between updates of the chart
+    :param int rows: Number of new rows that triggers an update (0 disables it)
+    """
+    config = load_config(config_path)
+    convergence_plot = config.get("plot", {}).get("convergence")
+    if convergence_plot is None:
+        print("ERROR - Invalid configuration: watch mode requires the 'convergence' plot")
+        sys.exit(1)
+
+    project_path = Path(config["project_path"])
+    solutions_path = data_validation.validate_file(
+        project_path / config["solutions_results"], extensions=".csv"
+    )
+    of_name = convergence_plot["of_name"]
+    sense = convergence_plot.get("sense", "minimize")
+    charts_path = project_path / "charts"
+
+    tail = SolutionsTail(solutions_path, ["solution_id", of_name])
+    state = None
+    total_rows = 0
+    new_rows = 0
+    last_update = None
+
+    Logger().log_info(f"Watching {solutions_path} (press Ctrl+C to stop)")
+    try:
+        while True:
+            if tail.truncated():
+                Logger().log_info(f"{solutions_path} was rewritten, reading it again")
+                state = None
+                total_rows = 0
+                new_rows = 0
+
+            for df in tail.read():
+                state = update_improvements(
+                    state, df["solution_id"].to_numpy(), df[of_name].to_numpy(), sense
+                )
+                new_rows += len(df)
+
+            elapsed = last_update is None or time.monotonic() - last_update >= interval
+            if state is not None and new_rows and (elapsed or (rows and new_rows >= rows)):
+                fig = make_subplots(rows=1, cols=1)
+                fig = add_improvements(VARIABLES, fig, state["iterations"], state["values"])
+                path_html = write_figure(VARIABLES, fig, charts_path, config.get("options"))
+
+                total_rows += new_rows
+                new_rows = 0
+                last_update = time.monotonic()
+                best = state["values"][-1] if len(state["values"]) else None
+                Logger().log_info(
+                    f"Convergence chart updated in: {path_html} "
+                    f"({total_rows} solutions, best {of_name}: {best})"
+                )
+
+            time.sleep(min(interval, POLL_INTERVAL))
+    except KeyboardInterrupt:
+        Logger().log_info("Watch mode stopped")